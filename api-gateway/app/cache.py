@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """LRU-кэш с ограничением числа записей и сроком жизни каждой записи.
+
+    Используется только из event loop шлюза, поэтому без блокировок.
+    generation растёт при каждой инвалидации: чтение, начатое до неё,
+    передаёт старое значение в set() и не кладёт в кэш устаревшие данные.
+    Записи можно объединять в группы (group в set()) и удалять группу целиком.
+    """
+
+    def __init__(self, maxsize, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._groups = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        item = self._data.get(key)
+        return item is not None and not self._expired(item)
+
+    def _expired(self, item):
+        expires_at = item[1]
+        return expires_at is not None and expires_at <= self._clock()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        if self._expired(item):
+            del self._data[key]
+            self._unlink(key, item)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def set(self, key, value, ttl=None, generation=None, group=None):
+        """Сохраняет значение; ttl записи не может превышать ttl кэша"""
+        if self.maxsize <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        if ttl is None:
+            ttl = self.ttl
+        elif self.ttl is not None:
+            ttl = min(ttl, self.ttl)
+        expires_at = self._clock() + ttl if ttl is not None else None
+        previous = self._data.get(key)
+        if previous is not None:
+            self._unlink(key, previous)
+        self._data[key] = (value, expires_at, group)
+        self._data.move_to_end(key)
+        if group is not None:
+            self._groups.setdefault(group, set()).add(key)
+        while len(self._data) > self.maxsize:
+            self._unlink(*self._data.popitem(last=False))
+            self.evictions += 1
+
+    def pop(self, key):
+        self.generation += 1
+        item = self._data.pop(key, None)
+        if item is None:
+            return None
+        self._unlink(key, item)
+        return item[0]
+
+    def group_size(self, group):
+        return len(self._groups.get(group, ()))
+
+    def pop_group(self, group):
+        """Удаляет все записи группы"""
+        self.generation += 1
+        for key in self._groups.pop(group, ()):
+            del self._data[key]
+
+    def _unlink(self, key, item):
+        group = item[2]
+        if group is None:
+            return
+        keys = self._groups[group]
+        keys.discard(key)
+        if not keys:
+            del self._groups[group]
+
+    def clear(self):
+        self.generation += 1
+        self._data.clear()
+        self._groups.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
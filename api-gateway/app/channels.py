@@ -0,0 +1,94 @@
+import itertools
+import os
+
+import grpc
+
+import crm_pb2_grpc
+
+
+def parse_addresses(env_name, default):
+    value = os.getenv(env_name, default)
+    addresses = [a.strip() for a in value.split(",") if a.strip()]
+    if not addresses:
+        raise RuntimeError(f"{env_name} must contain at least one address")
+    return addresses
+
+
+def keepalive_options():
+    return [
+        ("grpc.keepalive_time_ms", int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000"))),
+        ("grpc.keepalive_timeout_ms", int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+
+COMPRESSION_ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def message_size_options():
+    """Те же лимиты, что у сервисов: ответ больше лимита канал отверг бы с RESOURCE_EXHAUSTED"""
+    return [
+        ("grpc.max_send_message_length", int(os.getenv("GRPC_MAX_SEND_MESSAGE_BYTES", str(MAX_MESSAGE_BYTES)))),
+        ("grpc.max_receive_message_length", int(os.getenv("GRPC_MAX_RECEIVE_MESSAGE_BYTES", str(MAX_MESSAGE_BYTES)))),
+    ]
+
+
+def channel_options():
+    return keepalive_options() + message_size_options()
+
+
+def upload_compression():
+    """Сжатие пачек строк импорта клиентов (ImportCustomers); заказы CreateOrders идут несжатыми, ответы сжимают сами сервисы"""
+    name = os.getenv("GRPC_COMPRESSION", "gzip").strip().lower()
+    if name not in COMPRESSION_ALGORITHMS:
+        raise RuntimeError(f"GRPC_COMPRESSION must be one of: {', '.join(COMPRESSION_ALGORITHMS)}")
+    return COMPRESSION_ALGORITHMS[name]
+
+
+class ServiceChannels:
+    """Долгоживущие grpc.aio каналы к репликам одного сервиса, раздаются по кругу.
+
+    Создаётся внутри event loop шлюза и используется только из него,
+    поэтому блокировка вокруг счётчика не нужна.
+    """
+
+    def __init__(self, addresses, stub_class, options=None):
+        self.addresses = list(addresses)
+        self._channels = [
+            grpc.aio.insecure_channel(address, options=options or channel_options())
+            for address in self.addresses
+        ]
+        self._stubs = [stub_class(channel) for channel in self._channels]
+        self._cycle = itertools.cycle(self._stubs)
+
+    def stub(self):
+        return next(self._cycle)
+
+    async def close(self):
+        for channel in self._channels:
+            await channel.close()
+
+
+class ChannelManager:
+    """Создаётся при старте шлюза и закрывает все каналы при остановке"""
+
+    def __init__(self):
+        self.customers = ServiceChannels(
+            parse_addresses("CUSTOMER_SERVICE_ADDRESSES", "customer-service:50051"),
+            crm_pb2_grpc.CustomerServiceStub,
+        )
+        self.orders = ServiceChannels(
+            parse_addresses("ORDER_SERVICE_ADDRESSES", "order-service:50052"),
+            crm_pb2_grpc.OrderServiceStub,
+        )
+
+    async def close(self):
+        await self.customers.close()
+        await self.orders.close()
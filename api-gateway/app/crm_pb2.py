@@ -22,43 +22,88 @@ _runtime_version.ValidateProtobufRuntimeVersion(
 _sym_db = _symbol_database.Default()
 
 
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tcrm.proto\x12\x03\x63rm\"G\n\x08\x43ustomer\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x12\n\ncreated_at\x18\x04 \x01(\t\"4\n\x15\x43reateCustomerRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\" \n\x12GetCustomerRequest\x12\n\n\x02id\x18\x01 \x01(\t\"@\n\x15UpdateCustomerRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\"#\n\x15\x44\x65leteCustomerRequest\x12\n\n\x02id\x18\x01 \x01(\t\"\x07\n\x05\x45mpty\"3\n\x10\x43ustomerResponse\x12\x1f\n\x08\x63ustomer\x18\x01 \x01(\x0b\x32\r.crm.Customer\"9\n\x15\x43ustomersListResponse\x12 \n\tcustomers\x18\x01 \x03(\x0b\x32\r.crm.Customer\"a\n\x05Order\x12\n\n\x02id\x18\x01 \x01(\t\x12\x13\n\x0b\x63ustomer_id\x18\x02 \x01(\t\x12\x14\n\x0cproduct_name\x18\x03 \x01(\t\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x12\n\ncreated_at\x18\x05 \x01(\t\"O\n\x13\x43reateOrdersRequest\x12\x13\n\x0b\x63ustomer_id\x18\x01 \x01(\t\x12\x14\n\x0cproduct_name\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x01\"/\n\x18GetCustomerOrdersRequest\x12\x13\n\x0b\x63ustomer_id\x18\x01 \x01(\t\"*\n\rOrderResponse\x12\x19\n\x05order\x18\x01 \x01(\x0b\x32\n.crm.Order\"/\n\x11OrderListResponse\x12\x1a\n\x06orders\x18\x01 \x03(\x0b\x32\n.crm.Order2\xcd\x02\n\x0f\x43ustomerService\x12\x43\n\x0e\x43reateCustomer\x12\x1a.crm.CreateCustomerRequest\x1a\x15.crm.CustomerResponse\x12=\n\x0bGetCustomer\x12\x17.crm.GetCustomerRequest\x1a\x15.crm.CustomerResponse\x12\x43\n\x0eUpdateCustomer\x12\x1a.crm.UpdateCustomerRequest\x1a\x15.crm.CustomerResponse\x12\x38\n\x0e\x44\x65leteCustomer\x12\x1a.crm.DeleteCustomerRequest\x1a\n.crm.Empty\x12\x37\n\rListCustomers\x12\n.crm.Empty\x1a\x1a.crm.CustomersListResponse2\x97\x01\n\x0cOrderService\x12;\n\x0b\x43reateOrder\x12\x18.crm.CreateOrdersRequest\x1a\x12.crm.OrderResponse\x12J\n\x11GetCustomerOrders\x12\x1d.crm.GetCustomerOrdersRequest\x1a\x16.crm.OrderListResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tcrm.proto\x12\x03\x63rm\x1a google/protobuf/field_mask.proto\"G\n\x08\x43ustomer\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x12\n\ncreated_at\x18\x04 \x01(\t\"4\n\x15\x43reateCustomerRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\"L\n\x12GetCustomerRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12*\n\x06\x66ields\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"\'\n\x18\x42\x61tchGetCustomersRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\"R\n\x19\x42\x61tchGetCustomersResponse\x12 \n\tcustomers\x18\x01 \x03(\x0b\x32\r.crm.Customer\x12\x13\n\x0bmissing_ids\x18\x02 \x03(\t\"6\n\x16SearchCustomersRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\";\n\x17SearchCustomersResponse\x12 \n\tcustomers\x18\x01 \x03(\x0b\x32\r.crm.Customer\"@\n\x15UpdateCustomerRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\"#\n\x15\x44\x65leteCustomerRequest\x12\n\n\x02id\x18\x01 \x01(\t\"\x07\n\x05\x45mpty\"r\n\x0fMetricsResponse\x12\x30\n\x06values\x18\x01 \x03(\x0b\x32 .crm.MetricsResponse.ValuesEntry\x1a-\n\x0bValuesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"i\n\x14ListCustomersRequest\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\x12*\n\x06\x66ields\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\",\n\x16StreamCustomersRequest\x12\x12\n\nbatch_size\x18\x01 \x01(\x05\"7\n\x0b\x43ustomerRow\x12\x0b\n\x03row\x18\x01 \x01(\x03\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\"6\n\x14ImportCustomersChunk\x12\x1e\n\x04rows\x18\x01 \x03(\x0b\x32\x10.crm.CustomerRow\"(\n\x08RowError\x12\x0b\n\x03row\x18\x01 \x01(\x03\x12\x0f\n\x07message\x18\x02 \x01(\t\"Z\n\x17ImportCustomersResponse\x12\x10\n\x08imported\x18\x01 \x01(\x03\x12\x0e\n\x06\x66\x61iled\x18\x02 \x01(\x03\x12\x1d\n\x06\x65rrors\x18\x03 \x03(\x0b\x32\r.crm.RowError\"3\n\x10\x43ustomerResponse\x12\x1f\n\x08\x63ustomer\x18\x01 \x01(\x0b\x32\r.crm.Customer\"R\n\x15\x43ustomersListResponse\x12 \n\tcustomers\x18\x01 \x03(\x0b\x32\r.crm.Customer\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"a\n\x05Order\x12\n\n\x02id\x18\x01 \x01(\t\x12\x13\n\x0b\x63ustomer_id\x18\x02 \x01(\t\x12\x14\n\x0cproduct_name\x18\x03 \x01(\t\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x12\n\ncreated_at\x18\x05 \x01(\t\"O\n\x13\x43reateOrdersRequest\x12\x13\n\x0b\x63ustomer_id\x18\x01 \x01(\t\x12\x14\n\x0cproduct_name\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x01\"\xb1\x01\n\x18GetCustomerOrdersRequest\x12\x13\n\x0b\x63ustomer_id\x18\x01 \x01(\t\x12*\n\x06\x66ields\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\x12\x11\n\tpage_size\x18\x03 \x01(\x05\x12\x12\n\npage_token\x18\x04 \x01(\t\x12\x15\n\rcreated_after\x18\x05 \x01(\t\x12\x16\n\x0e\x63reated_before\x18\x06 \x01(\t\"*\n\rOrderResponse\x12\x19\n\x05order\x18\x01 \x01(\x0b\x32\n.crm.Order\"H\n\x11OrderListResponse\x12\x1a\n\x06orders\x18\x01 \x03(\x0b\x32\n.crm.Order\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\".\n\x17GetCustomerStatsRequest\x12\x13\n\x0b\x63ustomer_id\x18\x01 \x01(\t\"\x82\x01\n\rCustomerStats\x12\x13\n\x0b\x63ustomer_id\x18\x01 \x01(\t\x12\x13\n\x0border_count\x18\x02 \x01(\x03\x12\x13\n\x0btotal_spent\x18\x03 \x01(\x01\x12\x1b\n\x13\x61verage_order_value\x18\x04 \x01(\x01\x12\x15\n\rlast_order_at\x18\x05 \x01(\t\"\x8b\x01\n\x14RevenueReportRequest\x12\x0e\n\x06period\x18\x01 \x01(\t\x12\x10\n\x08group_by\x18\x02 \x01(\t\x12\x15\n\rcreated_after\x18\x03 \x01(\t\x12\x16\n\x0e\x63reated_before\x18\x04 \x01(\t\x12\x13\n\x0bpercentiles\x18\x05 \x03(\x01\x12\r\n\x05limit\x18\x06 \x01(\x05\"v\n\x10RevenueReportRow\x12\x14\n\x0cperiod_start\x18\x01 \x01(\t\x12\x0b\n\x03key\x18\x02 \x01(\t\x12\x13\n\x0border_count\x18\x03 \x01(\x03\x12\x0f\n\x07revenue\x18\x04 \x01(\x01\x12\x19\n\x11price_percentiles\x18\x05 \x03(\x01\"I\n\rRevenueReport\x12\x13\n\x0bpercentiles\x18\x01 \x03(\x01\x12#\n\x04rows\x18\x02 \x03(\x0b\x32\x15.crm.RevenueReportRow\"T\n\x13\x45xportOrdersRequest\x12\x0e\n\x06\x66ormat\x18\x01 \x01(\t\x12\x15\n\rcreated_after\x18\x02 \x01(\t\x12\x16\n\x0e\x63reated_before\x18\x03 \x01(\t\")\n\x0b\x45xportChunk\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x0c\n\x04rows\x18\x02 \x01(\x03\"7\n\x0bOrderResult\x12\x19\n\x05order\x18\x01 \x01(\x0b\x32\n.crm.Order\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"9\n\x14\x43reateOrdersResponse\x12!\n\x07results\x18\x01 \x03(\x0b\x32\x10.crm.OrderResult2\xbd\x05\n\x0f\x43ustomerService\x12\x43\n\x0e\x43reateCustomer\x12\x1a.crm.CreateCustomerRequest\x1a\x15.crm.CustomerResponse\x12=\n\x0bGetCustomer\x12\x17.crm.GetCustomerRequest\x1a\x15.crm.CustomerResponse\x12R\n\x11\x42\x61tchGetCustomers\x12\x1d.crm.BatchGetCustomersRequest\x1a\x1e.crm.BatchGetCustomersResponse\x12L\n\x0fSearchCustomers\x12\x1b.crm.SearchCustomersRequest\x1a\x1c.crm.SearchCustomersResponse\x12\x43\n\x0eUpdateCustomer\x12\x1a.crm.UpdateCustomerRequest\x1a\x15.crm.CustomerResponse\x12\x38\n\x0e\x44\x65leteCustomer\x12\x1a.crm.DeleteCustomerRequest\x1a\n.crm.Empty\x12\x46\n\rListCustomers\x12\x19.crm.ListCustomersRequest\x1a\x1a.crm.CustomersListResponse\x12?\n\x0fStreamCustomers\x12\x1b.crm.StreamCustomersRequest\x1a\r.crm.Customer0\x01\x12L\n\x0fImportCustomers\x12\x19.crm.ImportCustomersChunk\x1a\x1c.crm.ImportCustomersResponse(\x01\x12.\n\nGetMetrics\x12\n.crm.Empty\x1a\x14.crm.MetricsResponse2\xd5\x03\n\x0cOrderService\x12;\n\x0b\x43reateOrder\x12\x18.crm.CreateOrdersRequest\x1a\x12.crm.OrderResponse\x12\x45\n\x0c\x43reateOrders\x12\x18.crm.CreateOrdersRequest\x1a\x19.crm.CreateOrdersResponse(\x01\x12J\n\x11GetCustomerOrders\x12\x1d.crm.GetCustomerOrdersRequest\x1a\x16.crm.OrderListResponse\x12\x44\n\x10GetCustomerStats\x12\x1c.crm.GetCustomerStatsRequest\x1a\x12.crm.CustomerStats\x12\x41\n\x10GetRevenueReport\x12\x19.crm.RevenueReportRequest\x1a\x12.crm.RevenueReport\x12<\n\x0c\x45xportOrders\x12\x18.crm.ExportOrdersRequest\x1a\x10.crm.ExportChunk0\x01\x12.\n\nGetMetrics\x12\n.crm.Empty\x1a\x14.crm.MetricsResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'crm_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_CUSTOMER']._serialized_start=18
-  _globals['_CUSTOMER']._serialized_end=89
-  _globals['_CREATECUSTOMERREQUEST']._serialized_start=91
-  _globals['_CREATECUSTOMERREQUEST']._serialized_end=143
-  _globals['_GETCUSTOMERREQUEST']._serialized_start=145
-  _globals['_GETCUSTOMERREQUEST']._serialized_end=177
-  _globals['_UPDATECUSTOMERREQUEST']._serialized_start=179
-  _globals['_UPDATECUSTOMERREQUEST']._serialized_end=243
-  _globals['_DELETECUSTOMERREQUEST']._serialized_start=245
-  _globals['_DELETECUSTOMERREQUEST']._serialized_end=280
-  _globals['_EMPTY']._serialized_start=282
-  _globals['_EMPTY']._serialized_end=289
-  _globals['_CUSTOMERRESPONSE']._serialized_start=291
-  _globals['_CUSTOMERRESPONSE']._serialized_end=342
-  _globals['_CUSTOMERSLISTRESPONSE']._serialized_start=344
-  _globals['_CUSTOMERSLISTRESPONSE']._serialized_end=401
-  _globals['_ORDER']._serialized_start=403
-  _globals['_ORDER']._serialized_end=500
-  _globals['_CREATEORDERSREQUEST']._serialized_start=502
-  _globals['_CREATEORDERSREQUEST']._serialized_end=581
-  _globals['_GETCUSTOMERORDERSREQUEST']._serialized_start=583
-  _globals['_GETCUSTOMERORDERSREQUEST']._serialized_end=630
-  _globals['_ORDERRESPONSE']._serialized_start=632
-  _globals['_ORDERRESPONSE']._serialized_end=674
-  _globals['_ORDERLISTRESPONSE']._serialized_start=676
-  _globals['_ORDERLISTRESPONSE']._serialized_end=723
-  _globals['_CUSTOMERSERVICE']._serialized_start=726
-  _globals['_CUSTOMERSERVICE']._serialized_end=1059
-  _globals['_ORDERSERVICE']._serialized_start=1062
-  _globals['_ORDERSERVICE']._serialized_end=1213
+  _globals['_METRICSRESPONSE_VALUESENTRY']._loaded_options = None
+  _globals['_METRICSRESPONSE_VALUESENTRY']._serialized_options = b'8\001'
+  _globals['_CUSTOMER']._serialized_start=52
+  _globals['_CUSTOMER']._serialized_end=123
+  _globals['_CREATECUSTOMERREQUEST']._serialized_start=125
+  _globals['_CREATECUSTOMERREQUEST']._serialized_end=177
+  _globals['_GETCUSTOMERREQUEST']._serialized_start=179
+  _globals['_GETCUSTOMERREQUEST']._serialized_end=255
+  _globals['_BATCHGETCUSTOMERSREQUEST']._serialized_start=257
+  _globals['_BATCHGETCUSTOMERSREQUEST']._serialized_end=296
+  _globals['_BATCHGETCUSTOMERSRESPONSE']._serialized_start=298
+  _globals['_BATCHGETCUSTOMERSRESPONSE']._serialized_end=380
+  _globals['_SEARCHCUSTOMERSREQUEST']._serialized_start=382
+  _globals['_SEARCHCUSTOMERSREQUEST']._serialized_end=436
+  _globals['_SEARCHCUSTOMERSRESPONSE']._serialized_start=438
+  _globals['_SEARCHCUSTOMERSRESPONSE']._serialized_end=497
+  _globals['_UPDATECUSTOMERREQUEST']._serialized_start=499
+  _globals['_UPDATECUSTOMERREQUEST']._serialized_end=563
+  _globals['_DELETECUSTOMERREQUEST']._serialized_start=565
+  _globals['_DELETECUSTOMERREQUEST']._serialized_end=600
+  _globals['_EMPTY']._serialized_start=602
+  _globals['_EMPTY']._serialized_end=609
+  _globals['_METRICSRESPONSE']._serialized_start=611
+  _globals['_METRICSRESPONSE']._serialized_end=725
+  _globals['_METRICSRESPONSE_VALUESENTRY']._serialized_start=680
+  _globals['_METRICSRESPONSE_VALUESENTRY']._serialized_end=725
+  _globals['_LISTCUSTOMERSREQUEST']._serialized_start=727
+  _globals['_LISTCUSTOMERSREQUEST']._serialized_end=832
+  _globals['_STREAMCUSTOMERSREQUEST']._serialized_start=834
+  _globals['_STREAMCUSTOMERSREQUEST']._serialized_end=878
+  _globals['_CUSTOMERROW']._serialized_start=880
+  _globals['_CUSTOMERROW']._serialized_end=935
+  _globals['_IMPORTCUSTOMERSCHUNK']._serialized_start=937
+  _globals['_IMPORTCUSTOMERSCHUNK']._serialized_end=991
+  _globals['_ROWERROR']._serialized_start=993
+  _globals['_ROWERROR']._serialized_end=1033
+  _globals['_IMPORTCUSTOMERSRESPONSE']._serialized_start=1035
+  _globals['_IMPORTCUSTOMERSRESPONSE']._serialized_end=1125
+  _globals['_CUSTOMERRESPONSE']._serialized_start=1127
+  _globals['_CUSTOMERRESPONSE']._serialized_end=1178
+  _globals['_CUSTOMERSLISTRESPONSE']._serialized_start=1180
+  _globals['_CUSTOMERSLISTRESPONSE']._serialized_end=1262
+  _globals['_ORDER']._serialized_start=1264
+  _globals['_ORDER']._serialized_end=1361
+  _globals['_CREATEORDERSREQUEST']._serialized_start=1363
+  _globals['_CREATEORDERSREQUEST']._serialized_end=1442
+  _globals['_GETCUSTOMERORDERSREQUEST']._serialized_start=1445
+  _globals['_GETCUSTOMERORDERSREQUEST']._serialized_end=1622
+  _globals['_ORDERRESPONSE']._serialized_start=1624
+  _globals['_ORDERRESPONSE']._serialized_end=1666
+  _globals['_ORDERLISTRESPONSE']._serialized_start=1668
+  _globals['_ORDERLISTRESPONSE']._serialized_end=1740
+  _globals['_GETCUSTOMERSTATSREQUEST']._serialized_start=1742
+  _globals['_GETCUSTOMERSTATSREQUEST']._serialized_end=1788
+  _globals['_CUSTOMERSTATS']._serialized_start=1791
+  _globals['_CUSTOMERSTATS']._serialized_end=1921
+  _globals['_REVENUEREPORTREQUEST']._serialized_start=1924
+  _globals['_REVENUEREPORTREQUEST']._serialized_end=2063
+  _globals['_REVENUEREPORTROW']._serialized_start=2065
+  _globals['_REVENUEREPORTROW']._serialized_end=2183
+  _globals['_REVENUEREPORT']._serialized_start=2185
+  _globals['_REVENUEREPORT']._serialized_end=2258
+  _globals['_EXPORTORDERSREQUEST']._serialized_start=2260
+  _globals['_EXPORTORDERSREQUEST']._serialized_end=2344
+  _globals['_EXPORTCHUNK']._serialized_start=2346
+  _globals['_EXPORTCHUNK']._serialized_end=2387
+  _globals['_ORDERRESULT']._serialized_start=2389
+  _globals['_ORDERRESULT']._serialized_end=2444
+  _globals['_CREATEORDERSRESPONSE']._serialized_start=2446
+  _globals['_CREATEORDERSRESPONSE']._serialized_end=2503
+  _globals['_CUSTOMERSERVICE']._serialized_start=2506
+  _globals['_CUSTOMERSERVICE']._serialized_end=3207
+  _globals['_ORDERSERVICE']._serialized_start=3210
+  _globals['_ORDERSERVICE']._serialized_end=3679
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+import grpc
+
+import crm_pb2
+from cache import LRUCache
+
+logger = logging.getLogger("gateway.existence")
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class CustomerExistenceIndex:
+    """Позволяет не спрашивать customer-service о клиенте перед каждым заказом.
+
+    Клиент считается существующим, если он недавно подтверждён (TTL-кэш) или
+    есть в снимке Bloom-фильтра всех ID. Bloom-фильтр может ошибаться в
+    сторону «есть» с вероятностью error_rate, поэтому выключен по умолчанию.
+    Удалённые через шлюз клиенты попадают в tombstones и всегда
+    перепроверяются, пока очередной снимок их не учтёт. generation растёт при
+    каждом удалении: подтверждение, полученное до него, передаёт старое
+    значение в add() и не возвращает удалённого клиента в индекс.
+    """
+
+    def __init__(self, ttl, maxsize, bloom_enabled=False, bloom_capacity=1_000_000,
+                 bloom_error_rate=0.001, refresh_interval=300):
+        self.known = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.bloom_enabled = bloom_enabled
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.refresh_interval = refresh_interval
+        self.bloom = None
+        self.bloom_built_at = None
+        self.tombstones = set()
+        self._refresh_tombstones = None
+        self.bloom_hits = 0
+        self.backend_checks = 0
+        self.generation = 0
+
+    def add(self, customer_id, generation=None):
+        if generation is not None and generation != self.generation:
+            return
+        self.known.set(customer_id, True)
+        self.tombstones.discard(customer_id)
+
+    def remove(self, customer_id):
+        self.generation += 1
+        self.known.pop(customer_id)
+        if not self.bloom_enabled:
+            return
+        self.tombstones.add(customer_id)
+        if self._refresh_tombstones is not None:
+            self._refresh_tombstones.add(customer_id)
+
+    def might_exist(self, customer_id):
+        if customer_id in self.tombstones:
+            self.backend_checks += 1
+            return False
+        if self.known.get(customer_id):
+            return True
+        if self.bloom is not None and customer_id in self.bloom:
+            self.bloom_hits += 1
+            return True
+        self.backend_checks += 1
+        return False
+
+    async def refresh(self, stub):
+        # Удаления, пришедшие во время выгрузки, могли в неё не попасть
+        self._refresh_tombstones = set()
+        try:
+            bloom = await self._build(stub)
+            if bloom.count > self.bloom_capacity:
+                # Переполненный фильтр ошибается намного чаще error_rate:
+                # выгружаем ID ещё раз в фильтр с запасом по ёмкости
+                logger.warning("Клиентов больше ёмкости Bloom-фильтра, пересборка",
+                               extra={"customers": bloom.count, "capacity": self.bloom_capacity})
+                self.bloom_capacity = bloom.count * 2
+                bloom = await self._build(stub)
+            self.bloom = bloom
+            self.bloom_built_at = time.time()
+            self.tombstones = self._refresh_tombstones
+        finally:
+            self._refresh_tombstones = None
+
+    async def _build(self, stub):
+        bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        async for customer in stub.StreamCustomers(crm_pb2.StreamCustomersRequest()):
+            bloom.add(customer.id)
+        return bloom
+
+    async def run_refresh(self, get_stub):
+        while True:
+            try:
+                await self.refresh(get_stub())
+            except grpc.RpcError as e:
+                logger.warning("Не удалось обновить Bloom-фильтр клиентов", extra={"error": e.details()})
+            await asyncio.sleep(self.refresh_interval)
+
+    def stats(self):
+        return {
+            "known": self.known.stats(),
+            "bloom_enabled": self.bloom_enabled,
+            "bloom_entries": self.bloom.count if self.bloom is not None else 0,
+            "bloom_built_at": self.bloom_built_at,
+            "bloom_hits": self.bloom_hits,
+            "tombstones": len(self.tombstones),
+            "backend_checks": self.backend_checks,
+        }
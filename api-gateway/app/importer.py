@@ -0,0 +1,155 @@
+import codecs
+import csv
+import json
+
+import crm_pb2
+
+MAX_LINE_LENGTH = 64 * 1024
+IMPORT_CHUNK_ROWS = 1000
+MAX_IMPORT_ERRORS = 1000
+
+CSV_TYPES = ("text/csv",)
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class ImportErrors:
+    """Ошибки по строкам: считаются все, хранятся первые limit"""
+
+    def __init__(self, limit=MAX_IMPORT_ERRORS):
+        self.limit = limit
+        self.items = []
+        self.count = 0
+        self.fatal = None
+
+    def add(self, row, message):
+        self.count += 1
+        if len(self.items) < self.limit:
+            self.items.append({"row": row, "message": message})
+
+
+def detect_format(content_type):
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_TYPES:
+        return "csv"
+    if media_type in NDJSON_TYPES:
+        return "ndjson"
+    return None
+
+
+async def iter_lines(stream):
+    """Режет поток байт на строки, держа в памяти не больше одной строки"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    try:
+        async for chunk in stream:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+            if len(buffer) > MAX_LINE_LENGTH:
+                raise ImportFormatError(f"line is longer than {MAX_LINE_LENGTH} characters")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError("file is not valid UTF-8")
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+def ends_in_quotes(line, quoted=False):
+    """Остаётся ли открытым поле в кавычках в конце строки (правила csv по умолчанию)"""
+    field_start = not quoted
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quoted:
+            if char == '"':
+                if line[i + 1:i + 2] == '"':
+                    i += 1
+                else:
+                    quoted = False
+        elif char == '"' and field_start:
+            quoted = True
+        field_start = not quoted and char == ","
+        i += 1
+    return quoted
+
+
+async def csv_records(lines):
+    """Склеивает строки в записи CSV: поле в кавычках может содержать переводы строк"""
+    record = None
+    quoted = False
+    async for line in lines:
+        record = line if record is None else f"{record}\n{line}"
+        quoted = ends_in_quotes(line, quoted)
+        if quoted:
+            if len(record) > MAX_LINE_LENGTH:
+                raise ImportFormatError(f"record is longer than {MAX_LINE_LENGTH} characters")
+            continue
+        yield record
+        record = None
+    if record is not None:
+        raise ImportFormatError("unterminated quoted field")
+
+
+class CsvRows:
+    def __init__(self, header):
+        columns = [c.strip().lower() for c in next(csv.reader([header]))]
+        if "name" not in columns or "email" not in columns:
+            raise ImportFormatError("CSV header must contain name and email columns")
+        self.name_index = columns.index("name")
+        self.email_index = columns.index("email")
+        self.width = len(columns)
+
+    def parse(self, line):
+        values = next(csv.reader([line]))
+        if len(values) != self.width:
+            raise ValueError(f"expected {self.width} columns, got {len(values)}")
+        return values[self.name_index], values[self.email_index]
+
+
+def parse_ndjson(line):
+    try:
+        item = json.loads(line)
+    except ValueError:
+        raise ValueError("invalid JSON")
+    if not isinstance(item, dict):
+        raise ValueError("expected a JSON object")
+    name, email = item.get("name"), item.get("email")
+    if not isinstance(name, str) or not isinstance(email, str):
+        raise ValueError("name and email must be strings")
+    return name, email
+
+
+async def import_chunks(lines, parse, first_row, errors):
+    """Собирает строки в ImportCustomersChunk; ошибки разбора пишет в errors.
+
+    Исключение из итератора запросов grpc.aio превращает в отмену вызова,
+    поэтому ошибка формата сохраняется в errors.fatal и поток просто
+    завершается.
+    """
+    rows = []
+    row = first_row - 1
+    try:
+        async for line in lines:
+            row += 1
+            if not line.strip():
+                continue
+            try:
+                name, email = parse(line)
+            except ImportFormatError:
+                raise
+            except ValueError as e:
+                errors.add(row, str(e))
+                continue
+            rows.append(crm_pb2.CustomerRow(row=row, name=name, email=email))
+            if len(rows) >= IMPORT_CHUNK_ROWS:
+                yield crm_pb2.ImportCustomersChunk(rows=rows)
+                rows = []
+    except ImportFormatError as e:
+        errors.fatal = f"row {row + 1}: {e}"
+    if rows:
+        yield crm_pb2.ImportCustomersChunk(rows=rows)
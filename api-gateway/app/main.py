@@ -1,17 +1,30 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
 import grpc
 import jwt
 import datetime
+import asyncio
+import hashlib
+import time
 import sys
 from dotenv import load_dotenv
 import os
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from google.protobuf.field_mask_pb2 import FieldMask
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import crm_pb2
-import crm_pb2_grpc
+from channels import ChannelManager, upload_compression
+from cache import LRUCache
+from existence import CustomerExistenceIndex
+from log import log_metrics, setup_logging
+from serialization import customer_encoder, order_encoder, customer_order_encoder, customer_stats_encoder, json_response
+from importer import (
+    ImportErrors, ImportFormatError, CsvRows, csv_records, detect_format, import_chunks, iter_lines, parse_ndjson
+)
 
 class CustomerCreate(BaseModel):
     name: str
@@ -22,9 +35,34 @@ class OrderCreate(BaseModel):
     product_name: str
     price: float
 
+class OrderBatchCreate(BaseModel):
+    orders: list[OrderCreate] = Field(min_length=1, max_length=10000)
+
+class CustomerBatchGet(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=10000)
+
 class CustomerUpdate(BaseModel):
-    name: str
-    email: str
+    """Частичное обновление: меняются только переданные поля"""
+    name: str | None = None
+    email: str | None = None
+
+channels = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global channels
+    setup_logging("api-gateway")
+    channels = ChannelManager()
+    refresh_task = None
+    if customer_index.bloom_enabled:
+        refresh_task = asyncio.create_task(customer_index.run_refresh(get_customer_stub))
+    try:
+        yield
+    finally:
+        if refresh_task is not None:
+            refresh_task.cancel()
+        await channels.close()
+        channels = None
 
 app = FastAPI(
     title="CRM API",
@@ -38,7 +76,8 @@ app = FastAPI(
         "name": "MIT",
         "url": "https://opensource.org/licenses/MIT",
     },
-    debug=True
+    debug=True,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -57,27 +96,59 @@ JWT_SECRET = os.getenv("JWT_SECRET")
 if not JWT_SECRET:
     raise RuntimeError("JWT_SECRET not installed in the .env file")
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+token_cache = LRUCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "300"))
+)
+
+customer_cache = LRUCache(
+    maxsize=int(os.getenv("CUSTOMER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("CUSTOMER_CACHE_TTL", "30"))
+)
+orders_cache = LRUCache(
+    maxsize=int(os.getenv("ORDERS_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("ORDERS_CACHE_TTL", "30"))
+)
+
+customer_index = CustomerExistenceIndex(
+    ttl=float(os.getenv("CUSTOMER_INDEX_TTL", "60")),
+    maxsize=int(os.getenv("CUSTOMER_INDEX_SIZE", "100000")),
+    bloom_enabled=os.getenv("CUSTOMER_BLOOM_ENABLED", "false").lower() == "true",
+    bloom_capacity=int(os.getenv("CUSTOMER_BLOOM_CAPACITY", "1000000")),
+    bloom_error_rate=float(os.getenv("CUSTOMER_BLOOM_ERROR_RATE", "0.001")),
+    refresh_interval=float(os.getenv("CUSTOMER_BLOOM_REFRESH_INTERVAL", "300"))
+)
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    key = hashlib.sha256(credentials.credentials.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    # Запись живёт не дольше самого токена, чтобы просроченный токен снова дошёл до jwt.decode
+    exp = payload.get("exp")
+    ttl = exp - time.time() if exp is not None else None
+    if ttl is None or ttl > 0:
+        token_cache.set(key, payload, ttl)
+    return payload
+
 
 def get_customer_stub():
-    channel = grpc.insecure_channel("customer-service:50051")
-    return crm_pb2_grpc.CustomerServiceStub(channel)
+    return channels.customers.stub()
 
 
 def get_order_stub():
-    channel = grpc.insecure_channel('order-service:50052')
-    return crm_pb2_grpc.OrderServiceStub(channel)
+    return channels.orders.stub()
 
 @app.post("/register", description="Регистрация пользователей в системе")
-def register(username: str = None):
+async def register(username: str = None):
     token = jwt.encode(
         {
             "sub": username or "user",
@@ -89,7 +160,7 @@ def register(username: str = None):
     return {"access_token": token, "token_type": "bearer"}
 
 @app.post("/login", description="Авторизация пользователей в системе")
-def login():
+async def login():
     token = jwt.encode(
         {
             "sub": "user",
@@ -101,82 +172,266 @@ def login():
     return {"access_token": token, "token_type": "bearer"}
 
 
-@app.get("/customers", dependencies=[Depends(verify_token)], description="Список клиентов в системе")
-def list_customers():
+@app.get("/metrics", dependencies=[Depends(verify_token)], description="Метрики шлюза")
+async def metrics():
+    customer_service, order_service = await asyncio.gather(
+        service_metrics(get_customer_stub()),
+        service_metrics(get_order_stub())
+    )
+    return {
+        "token_cache": token_cache.stats(),
+        "customer_cache": customer_cache.stats(),
+        "orders_cache": orders_cache.stats(),
+        "customer_index": customer_index.stats(),
+        "log": log_metrics(),
+        "customer_service": customer_service,
+        "order_service": order_service
+    }
+
+
+async def service_metrics(stub):
+    try:
+        response = await stub.GetMetrics(crm_pb2.Empty())
+    except grpc.RpcError as e:
+        return {"error": e.details()}
+    return dict(response.values)
+
+
+def field_mask(encoder, fields):
+    """?fields=id,name → кодировщик только этих полей и FieldMask для сервиса"""
+    if fields is None:
+        return encoder, None
+    try:
+        masked = encoder.only(f.strip() for f in fields.split(",") if f.strip())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return masked, FieldMask(paths=masked.fields)
+
+
+@app.get("/customers", dependencies=[Depends(verify_token)], description="Список клиентов в системе (постранично)")
+async def list_customers(limit: int = Query(100, ge=1, le=1000), cursor: str = None, fields: str = None):
+    encoder, mask = field_mask(customer_encoder, fields)
     stub = get_customer_stub()
     try:
-        response = stub.ListCustomers(crm_pb2.Empty())
-        customers = [
-            {
-                "id": i.id,
-                "name": i.name,
-                "email": i.email,
-                "created_at": i.created_at
-            }
-            for i in response.customers
-        ]
-        return {"customers": customers}
+        request = crm_pb2.ListCustomersRequest(page_size=limit, page_token=cursor or "", fields=mask)
+        response = await stub.ListCustomers(request)
+        return json_response({
+            "customers": encoder.rows(response.customers),
+            "next_cursor": response.next_page_token or None
+        })
     except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
         raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()}")
 
 
+STREAM_FLUSH_ROWS = 500
+
+@app.get("/customers/stream", dependencies=[Depends(verify_token)], description="Выгрузка всех клиентов в формате NDJSON")
+async def stream_customers():
+    stub = get_customer_stub()
+    call = stub.StreamCustomers(crm_pb2.StreamCustomersRequest())
+    try:
+        # Первое сообщение читаем до ответа, чтобы ошибка сервиса вернулась обычным статусом
+        first = await call.read()
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()}")
+
+    async def lines():
+        buffer = []
+        customer = first
+        try:
+            while customer is not grpc.aio.EOF:
+                buffer.append(customer)
+                if len(buffer) >= STREAM_FLUSH_ROWS:
+                    yield customer_encoder.ndjson(buffer)
+                    buffer = []
+                customer = await call.read()
+            if buffer:
+                yield customer_encoder.ndjson(buffer)
+        finally:
+            call.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.post("/customers", dependencies=[Depends(verify_token)], description="Создание нового клиента в системе")
-def create_customer(customer: CustomerCreate):
+async def create_customer(customer: CustomerCreate):
     stub = get_customer_stub()
     request = crm_pb2.CreateCustomerRequest(name=customer.name, email=customer.email)
     try:
-        response = stub.CreateCustomer(request)
-        return {
-            "id": response.customer.id,
-            "name": response.customer.name,
-            "email": response.customer.email,
-            "created_at": response.customer.created_at
-        }
+        response = await stub.CreateCustomer(request)
+        customer_index.add(response.customer.id)
+        return json_response(customer_encoder.row(response.customer))
     except grpc.RpcError as e:
         raise HTTPException(status_code=500, detail=e.details())
     
 
+UPLOAD_COMPRESSION = upload_compression()
+
+@app.post("/customers/import", dependencies=[Depends(verify_token)], description="Потоковый импорт клиентов из CSV (name,email) или NDJSON")
+async def import_customers(request: Request):
+    import_format = detect_format(request.headers.get("content-type"))
+    if import_format is None:
+        raise HTTPException(status_code=415, detail="Поддерживаются text/csv и application/x-ndjson")
+
+    lines = iter_lines(request.stream())
+    errors = ImportErrors()
+    try:
+        if import_format == "csv":
+            lines = csv_records(lines)
+            header = await anext(lines, None)
+            if header is None:
+                raise HTTPException(status_code=400, detail="Пустой файл")
+            parse, first_row = CsvRows(header).parse, 2
+        else:
+            parse, first_row = parse_ndjson, 1
+
+        stub = get_customer_stub()
+        # Пачки строк импорта крупные и хорошо сжимаются; заказы CreateOrders
+        # идут по одному на сообщение, им сжатие не нужно
+        response = await stub.ImportCustomers(
+            import_chunks(lines, parse, first_row, errors), compression=UPLOAD_COMPRESSION
+        )
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=500, detail=e.details())
+
+    items = errors.items + [{"row": e.row, "message": e.message} for e in response.errors]
+    items.sort(key=lambda e: e["row"])
+    result = {
+        "imported": response.imported,
+        "failed": errors.count + response.failed,
+        "errors": items[:errors.limit]
+    }
+    if errors.fatal:
+        # Пачки до ошибки уже сохранены, поэтому отдаём и счётчики
+        raise HTTPException(status_code=400, detail={"message": errors.fatal, **result})
+    return result
+
+
+async def batch_get_customers(customer_ids):
+    """Клиенты по ID из кэша шлюза и одним BatchGetCustomers; возвращает найденных и отсутствующие ID"""
+    found = {}
+    pending = []
+    for customer_id in dict.fromkeys(customer_ids):
+        customer = customer_cache.get(customer_id)
+        if customer is None:
+            pending.append(customer_id)
+        else:
+            found[customer_id] = customer
+
+    missing = []
+    if pending:
+        generation = customer_cache.generation
+        index_generation = customer_index.generation
+        stub = get_customer_stub()
+        response = await stub.BatchGetCustomers(crm_pb2.BatchGetCustomersRequest(ids=pending))
+        for customer in response.customers:
+            found[customer.id] = customer
+            customer_cache.set(customer.id, customer, generation=generation)
+            customer_index.add(customer.id, generation=index_generation)
+        missing = list(response.missing_ids)
+    return found, missing
+
+
+@app.post("/customers/batch-get", dependencies=[Depends(verify_token)], description="Получение клиентов по списку ID (до 10000)")
+async def batch_get(batch: CustomerBatchGet):
+    try:
+        found, missing = await batch_get_customers(batch.ids)
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=500, detail=e.details())
+    customers = [found[c] for c in dict.fromkeys(batch.ids) if c in found]
+    return json_response({"customers": customer_encoder.rows(customers), "missing_ids": missing})
+
+
+# Объявлен до /customers/{customer_id}, иначе "search" попадёт в customer_id
+@app.get("/customers/search", dependencies=[Depends(verify_token)], description="Поиск клиентов по подстроке имени или email")
+async def search_customers(q: str = Query(min_length=3, max_length=200), limit: int = Query(20, ge=1, le=100)):
+    stub = get_customer_stub()
+    try:
+        response = await stub.SearchCustomers(crm_pb2.SearchCustomersRequest(query=q, limit=limit))
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
+        raise HTTPException(status_code=500, detail=e.details())
+    return json_response({"customers": customer_encoder.rows(response.customers)})
+
+
+@app.get("/customers/{customer_id}", dependencies=[Depends(verify_token)], description="Получение клиента по ID")
+async def get_customer(customer_id: str, fields: str = None):
+    encoder, mask = field_mask(customer_encoder, fields)
+    customer = customer_cache.get(customer_id)
+    if customer is None:
+        generation = customer_cache.generation
+        index_generation = customer_index.generation
+        stub = get_customer_stub()
+        try:
+            response = await stub.GetCustomer(crm_pb2.GetCustomerRequest(id=customer_id, fields=mask))
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.NOT_FOUND:
+                raise HTTPException(status_code=404, detail="Клиент не найден")
+            raise HTTPException(status_code=500, detail=e.details())
+        customer = response.customer
+        # В кэше только клиенты целиком: из них отдаются и ответы с ?fields=
+        if mask is None:
+            customer_cache.set(customer_id, customer, generation=generation)
+        customer_index.add(customer_id, generation=index_generation)
+    return json_response(encoder.row(customer))
+
+
 @app.put("/customers/{customer_id}", dependencies=[Depends(verify_token)], description="Обновление данных клиента в системе")
-def update_customer(customer_id: str, customer: CustomerUpdate):
+async def update_customer(customer_id: str, customer: CustomerUpdate):
     stub = get_customer_stub()
-    request = crm_pb2.UpdateCustomerRequest(id=customer_id, name=customer.name, email=customer.email)
-    try:
-        response = stub.UpdateCustomer(request)
-        return {
-            "id": response.customer.id,
-            "name": response.customer.name,
-            "email": response.customer.email,
-            "created_at": response.customer.created_at
-        }
+    request = crm_pb2.UpdateCustomerRequest(id=customer_id, name=customer.name or "", email=customer.email or "")
+    try:
+        response = await stub.UpdateCustomer(request)
+        return json_response(customer_encoder.row(response.customer))
     except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Клиент не найден")
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
         raise HTTPException(status_code=500, detail=e.details())
+    finally:
+        customer_cache.pop(customer_id)
     
 
 @app.delete("/customers/{customer_id}", dependencies=[Depends(verify_token)], description="Удаление клиента из системы")
-def delete_customer(customer_id: str):
+async def delete_customer(customer_id: str):
     stub = get_customer_stub()
     request = crm_pb2.DeleteCustomerRequest(id=customer_id)
     try:
-        stub.DeleteCustomer(request)
+        await stub.DeleteCustomer(request)
         return {"status": "deleted"}
     except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Клиент не найден")
         raise HTTPException(status_code=500, detail=e.details())
+    finally:
+        customer_cache.pop(customer_id)
+        customer_index.remove(customer_id)
     
 
 @app.post("/orders", dependencies=[Depends(verify_token)], description="Создание нового заказа в системе")
-def create_order(order: OrderCreate):
-    stub = get_customer_stub()
-    try:
-        customer_request = crm_pb2.GetCustomerRequest(id=order.customer_id)
-        customer_response = stub.GetCustomer(customer_request)
-        
-        if not customer_response.customer:
-            raise HTTPException(status_code=404, detail="Клиент не найден")
-    except grpc.RpcError as e:
-        if e.code() == grpc.StatusCode.NOT_FOUND:
-            raise HTTPException(status_code=404, detail="Клиент не найден")
-        else:
-            raise HTTPException(status_code=500, detail=f"Ошибка сервиса клиентов: {e.details()}")
+async def create_order(order: OrderCreate):
+    if not customer_index.might_exist(order.customer_id):
+        # Удаление во время GetCustomer не должно вернуть клиента в индекс
+        generation = customer_index.generation
+        stub = get_customer_stub()
+        try:
+            customer_request = crm_pb2.GetCustomerRequest(id=order.customer_id)
+            customer_response = await stub.GetCustomer(customer_request)
+
+            if not customer_response.customer:
+                raise HTTPException(status_code=404, detail="Клиент не найден")
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.NOT_FOUND:
+                raise HTTPException(status_code=404, detail="Клиент не найден")
+            else:
+                raise HTTPException(status_code=500, detail=f"Ошибка сервиса клиентов: {e.details()}")
+        customer_index.add(order.customer_id, generation=generation)
 
     stub = get_order_stub()
     request = crm_pb2.CreateOrdersRequest(
@@ -185,33 +440,203 @@ def create_order(order: OrderCreate):
         price=order.price
     )
     try:
-        response = stub.CreateOrder(request)
-        return {
-            "id": response.order.id,
-            "customer_id": response.order.customer_id,
-            "product_name": response.order.product_name,
-            "price": response.order.price,
-            "created_at": response.order.created_at
-        }
+        response = await stub.CreateOrder(request)
+        return json_response(order_encoder.row(response.order))
     except grpc.RpcError as e:
         raise HTTPException(status_code=500, detail=e.details())
+    finally:
+        orders_cache.pop_group(order.customer_id)
+
+
+async def find_missing_customers(customer_ids):
+    """Возвращает ID клиентов, которых нет в customer-service"""
+    unknown = [c for c in customer_ids if not customer_index.might_exist(c)]
+    if not unknown:
+        return set()
+    _, missing = await batch_get_customers(unknown)
+    return set(missing)
+
+
+@app.post("/orders/batch", dependencies=[Depends(verify_token)], description="Пакетное создание заказов (до 10000 за запрос)")
+async def create_orders_batch(batch: OrderBatchCreate):
+    customer_ids = {o.customer_id for o in batch.orders}
+    try:
+        missing = await find_missing_customers(customer_ids)
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка сервиса клиентов: {e.details()}")
 
+    accepted = [o for o in batch.orders if o.customer_id not in missing]
 
-@app.get("/orders/customer/{customer_id}", dependencies=[Depends(verify_token)], description="Список заказов в системе")
-def get_orders_by_customer(customer_id: str):
+    async def requests():
+        for o in accepted:
+            yield crm_pb2.CreateOrdersRequest(
+                customer_id=o.customer_id,
+                product_name=o.product_name,
+                price=o.price
+            )
+
+    created = iter(())
+    if accepted:
+        stub = get_order_stub()
+        try:
+            response = await stub.CreateOrders(requests())
+            created = iter(response.results)
+        except grpc.RpcError as e:
+            raise HTTPException(status_code=500, detail=e.details())
+        finally:
+            for customer_id in customer_ids:
+                orders_cache.pop_group(customer_id)
+
+    results = []
+    for o in batch.orders:
+        if o.customer_id in missing:
+            results.append({"error": "Клиент не найден"})
+            continue
+        result = next(created)
+        if result.error:
+            results.append({"error": result.error})
+        else:
+            results.append({"order": order_encoder.row(result.order)})
+
+    failed = sum(1 for r in results if "error" in r)
+    return json_response({"created": len(results) - failed, "failed": failed, "results": results})
+
+
+EXPORT_MEDIA_TYPES = {
+    "arrow": ("application/vnd.apache.arrow.stream", "orders.arrows"),
+    "parquet": ("application/vnd.apache.parquet", "orders.parquet"),
+}
+
+@app.get("/orders/export", dependencies=[Depends(verify_token)], description="Выгрузка заказов (всех или за период) файлом Arrow IPC или Parquet")
+async def export_orders(
+    export_format: str = Query("arrow", alias="format", pattern="^(arrow|parquet)$"),
+    created_after: datetime.datetime | None = None,
+    created_before: datetime.datetime | None = None
+):
+    stub = get_order_stub()
+    call = stub.ExportOrders(crm_pb2.ExportOrdersRequest(
+        format=export_format,
+        created_after=created_after.isoformat() if created_after else "",
+        created_before=created_before.isoformat() if created_before else ""
+    ))
+    try:
+        # Первое сообщение читаем до ответа, чтобы ошибка сервиса вернулась обычным статусом
+        first = await call.read()
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
+        raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()} (code: {e.code().name})")
+
+    async def chunks():
+        # Куски файла отдаются клиенту по мере чтения из сервиса, целиком файл в шлюзе не собирается
+        chunk = first
+        try:
+            while chunk is not grpc.aio.EOF:
+                if chunk.data:
+                    yield chunk.data
+                chunk = await call.read()
+        finally:
+            call.cancel()
+
+    media_type, filename = EXPORT_MEDIA_TYPES[export_format]
+    return StreamingResponse(
+        chunks(), media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/orders/customer/{customer_id}/stats", dependencies=[Depends(verify_token)], description="Число заказов клиента, сумма, средний чек и время последнего заказа")
+async def get_customer_order_stats(customer_id: str):
+    stub = get_order_stub()
+    try:
+        response = await stub.GetCustomerStats(crm_pb2.GetCustomerStatsRequest(customer_id=customer_id))
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()} (code: {e.code().name})")
+    stats = customer_stats_encoder.row(response)
+    stats["last_order_at"] = stats["last_order_at"] or None
+    return json_response(stats)
+
+
+# Страниц одного клиента в orders_cache: обход всех страниц не вытесняет других клиентов
+ORDERS_CACHE_PAGES = 16
+
+@app.get("/orders/customer/{customer_id}", dependencies=[Depends(verify_token)], description="Заказы клиента постранично, с фильтром по дате создания")
+async def get_orders_by_customer(
+    customer_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str = None,
+    created_after: datetime.datetime | None = None,
+    created_before: datetime.datetime | None = None,
+    fields: str = None
+):
+    encoder, mask = field_mask(customer_order_encoder, fields)
+    created_after = created_after.isoformat() if created_after else ""
+    created_before = created_before.isoformat() if created_before else ""
+    # Каждая страница — отдельная запись в группе клиента: ORDERS_CACHE_SIZE
+    # ограничивает число страниц, а новый заказ сбрасывает группу целиком
+    page_key = (customer_id, limit, cursor, created_after, created_before)
+    response = orders_cache.get(page_key)
+    try:
+        if response is None:
+            generation = orders_cache.generation
+            stub = get_order_stub()
+            request = crm_pb2.GetCustomerOrdersRequest(
+                customer_id=customer_id,
+                fields=mask,
+                page_size=limit,
+                page_token=cursor or "",
+                created_after=created_after,
+                created_before=created_before
+            )
+            response = await stub.GetCustomerOrders(request)
+            if mask is None and orders_cache.group_size(customer_id) < ORDERS_CACHE_PAGES:
+                orders_cache.set(page_key, response, generation=generation, group=customer_id)
+        return json_response({
+            "orders": encoder.rows(response.orders),
+            "next_cursor": response.next_page_token or None
+        })
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
+        raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()} (code: {e.code().name})")
+
+
+@app.get("/reports/revenue", dependencies=[Depends(verify_token)], description="Выручка, число заказов и перцентили цены по дням, неделям или месяцам, по товарам или клиентам")
+async def get_revenue_report(
+    period: str = Query("month", pattern="^(day|week|month)$"),
+    group_by: str = Query(None, pattern="^(product|customer)$"),
+    created_after: datetime.datetime | None = None,
+    created_before: datetime.datetime | None = None,
+    percentiles: str = None,
+    limit: int = Query(0, ge=0)
+):
+    try:
+        percentiles = [float(p) for p in percentiles.split(",") if p.strip()] if percentiles else []
+    except ValueError:
+        raise HTTPException(status_code=400, detail="percentiles: список чисел через запятую")
     stub = get_order_stub()
-    request = crm_pb2.GetCustomerOrdersRequest(customer_id=customer_id)
     try:
-        response = stub.GetCustomerOrders(request)
-        orders = [
+        response = await stub.GetRevenueReport(crm_pb2.RevenueReportRequest(
+            period=period,
+            group_by=group_by or "",
+            created_after=created_after.isoformat() if created_after else "",
+            created_before=created_before.isoformat() if created_before else "",
+            percentiles=percentiles,
+            limit=limit
+        ))
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
+        raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()} (code: {e.code().name})")
+    return json_response({
+        "percentiles": list(response.percentiles),
+        "rows": [
             {
-                "id": o.id,
-                "product_name": o.product_name,
-                "price": o.price,
-                "created_at": o.created_at
+                "period_start": row.period_start,
+                "key": row.key or None,
+                "order_count": row.order_count,
+                "revenue": row.revenue,
+                "price_percentiles": list(row.price_percentiles)
             }
-            for o in response.orders
+            for row in response.rows
         ]
-        return {"orders": orders}
-    except grpc.RpcError as e:
-        raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()} (code: {e.code().name})")
\ No newline at end of file
+    })
@@ -0,0 +1,65 @@
+import json
+from operator import attrgetter
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+
+    def dumps(value):
+        return orjson.dumps(value)
+except ImportError:
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+CUSTOMER_FIELDS = ("id", "name", "email", "created_at")
+ORDER_FIELDS = ("id", "customer_id", "product_name", "price", "created_at")
+CUSTOMER_ORDER_FIELDS = ("id", "product_name", "price", "created_at")
+CUSTOMER_STATS_FIELDS = ("customer_id", "order_count", "total_spent", "average_order_value", "last_order_at")
+
+
+class MessageEncoder:
+    """Переводит protobuf-сообщения в JSON-байты, минуя jsonable_encoder и stdlib json.
+
+    Поля читаются одним attrgetter, а строка живёт только до вызова orjson:
+    замеры показали, что склейка JSON по полям вручную медленнее, чем
+    отдать orjson короткоживущий mapping.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        getter = attrgetter(*self.fields)
+        self._values = getter if len(self.fields) > 1 else lambda message: (getter(message),)
+        self._masked = {}
+
+    def only(self, fields):
+        """Кодировщик для подмножества полей (?fields=); ValueError — неизвестное поле"""
+        key = frozenset(fields)
+        encoder = self._masked.get(key)
+        if encoder is None:
+            unknown = sorted(key.difference(self.fields))
+            if unknown or not key:
+                raise ValueError(f"Неизвестные поля: {', '.join(unknown)}" if unknown else "Пустой список полей")
+            encoder = self._masked[key] = MessageEncoder(f for f in self.fields if f in key)
+        return encoder
+
+    def row(self, message):
+        return dict(zip(self.fields, self._values(message)))
+
+    def rows(self, messages):
+        fields, values = self.fields, self._values
+        return [dict(zip(fields, values(m))) for m in messages]
+
+    def ndjson(self, messages):
+        return b"".join(dumps(row) + b"\n" for row in self.rows(messages))
+
+
+customer_encoder = MessageEncoder(CUSTOMER_FIELDS)
+order_encoder = MessageEncoder(ORDER_FIELDS)
+customer_order_encoder = MessageEncoder(CUSTOMER_ORDER_FIELDS)
+customer_stats_encoder = MessageEncoder(CUSTOMER_STATS_FIELDS)
+
+
+def json_response(content, status_code=200):
+    return Response(content=dumps(content), status_code=status_code, media_type="application/json")
@@ -0,0 +1,95 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from cache import LRUCache
+
+
+def test_lru_cache_groups():
+    """Тест: группа удаляется целиком, вытеснение и истечение убирают ключ из группы"""
+    now = [0.0]
+    cache = LRUCache(maxsize=3, ttl=10, clock=lambda: now[0])
+    cache.set(("a", 1), "a1", group="a")
+    cache.set(("a", 2), "a2", group="a")
+    cache.set(("b", 1), "b1", group="b")
+    assert cache.group_size("a") == 2
+
+    cache.set(("c", 1), "c1", group="c")
+    assert cache.group_size("a") == 1
+
+    now[0] = 10
+    assert cache.get(("b", 1)) is None
+    assert cache.group_size("b") == 0
+
+    generation = cache.generation
+    cache.pop_group("a")
+    assert cache.get(("a", 2)) is None
+    assert cache.group_size("a") == 0
+    assert cache.generation == generation + 1
+    cache.set(("a", 2), "stale", generation=generation, group="a")
+    assert ("a", 2) not in cache
+    assert len(cache) == 1
+
+
+def test_lru_cache_eviction():
+    """Тест: при переполнении вытесняется давно не читанная запись"""
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+    cache.set("a", 10)
+    assert len(cache) == 2 and cache.get("a") == 10
+
+
+def test_lru_cache_ttl():
+    """Тест: запись истекает через ttl кэша; ttl записи не больше ttl кэша"""
+    now = [0.0]
+    cache = LRUCache(maxsize=10, ttl=30, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+    cache.set("c", 3, ttl=100)
+
+    now[0] = 5
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    now[0] = 30
+    assert "a" not in cache
+    assert cache.get("c", "нет") == "нет"
+
+    stats = cache.stats()
+    assert stats["expirations"] == 2
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_ratio"] == 1 / 3
+
+
+def test_lru_cache_generation():
+    """Тест: значение, прочитанное до инвалидации, в кэш не попадает"""
+    cache = LRUCache(maxsize=10)
+    cache.set("a", "old")
+
+    generation = cache.generation
+    assert cache.pop("a") == "old"
+    cache.set("a", "stale", generation=generation)
+    assert "a" not in cache
+
+    generation = cache.generation
+    cache.set("a", "fresh", generation=generation)
+    assert cache.get("a") == "fresh"
+
+    cache.clear()
+    cache.set("a", "stale", generation=generation)
+    assert len(cache) == 0
+
+
+def test_lru_cache_disabled():
+    """Тест: maxsize=0 отключает кэш"""
+    cache = LRUCache(maxsize=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None and len(cache) == 0
@@ -0,0 +1,117 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from cache import LRUCache
+from existence import BloomFilter, CustomerExistenceIndex
+import crm_pb2
+
+
+class FakeCustomerStub:
+    """StreamCustomers отдаёт текущий список ID; on_stream вызывается после каждой выгрузки"""
+
+    def __init__(self, ids, on_stream=None):
+        self.ids = ids
+        self.on_stream = on_stream
+        self.streams = 0
+
+    async def StreamCustomers(self, request):
+        self.streams += 1
+        for customer_id in list(self.ids):
+            yield crm_pb2.Customer(id=customer_id)
+        if self.on_stream:
+            self.on_stream()
+
+
+def false_positive_rate(bloom, probes=20000):
+    return sum(f"unknown_{i}" in bloom for i in range(probes)) / probes
+
+
+def test_bloom_filter():
+    """Тест: добавленные ID всегда находятся, ложные срабатывания в пределах error_rate"""
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"cust_{i}")
+    assert all(f"cust_{i}" in bloom for i in range(5000))
+    assert bloom.count == 5000
+    assert false_positive_rate(bloom) < 0.02
+
+
+def test_existence_positive_cache_ttl():
+    """Тест: подтверждённый клиент считается существующим до истечения TTL"""
+    now = [0.0]
+    index = CustomerExistenceIndex(ttl=60, maxsize=100)
+    index.known = LRUCache(maxsize=100, ttl=60, clock=lambda: now[0])
+
+    assert not index.might_exist("cust_1")
+    index.add("cust_1")
+    assert index.might_exist("cust_1")
+    now[0] = 60
+    assert not index.might_exist("cust_1")
+    assert index.backend_checks == 2
+
+
+def test_existence_bloom_refresh():
+    """Тест: после снимка клиенты из customer-service проходят по Bloom-фильтру"""
+    index = CustomerExistenceIndex(ttl=60, maxsize=100, bloom_enabled=True, bloom_capacity=1000)
+    asyncio.run(index.refresh(FakeCustomerStub([f"cust_{i}" for i in range(500)])))
+
+    assert all(index.might_exist(f"cust_{i}") for i in range(500))
+    assert index.bloom_hits == 500
+    assert index.stats()["bloom_entries"] == 500
+    assert index.bloom_built_at is not None
+
+
+def test_existence_bloom_overflow_rebuilds():
+    """Тест: клиентов больше ёмкости — фильтр пересобирается до установки, а не в следующий раз"""
+    ids = [f"cust_{i}" for i in range(3000)]
+    stub = FakeCustomerStub(ids)
+    index = CustomerExistenceIndex(ttl=60, maxsize=100, bloom_enabled=True, bloom_capacity=1000, bloom_error_rate=0.01)
+    asyncio.run(index.refresh(stub))
+
+    assert stub.streams == 2
+    assert index.bloom_capacity == 6000
+    assert all(customer_id in index.bloom for customer_id in ids)
+    assert false_positive_rate(index.bloom) < 0.02
+
+
+def test_existence_tombstones():
+    """Тест: удалённый клиент перепроверяется, пока снимок без него не построен"""
+    ids = ["cust_1", "cust_2", "cust_3"]
+    index = CustomerExistenceIndex(ttl=60, maxsize=100, bloom_enabled=True, bloom_capacity=100)
+    asyncio.run(index.refresh(FakeCustomerStub(ids)))
+
+    index.add("cust_1")
+    index.remove("cust_1")
+    ids.remove("cust_1")
+    assert not index.might_exist("cust_1")
+
+    # Удаление во время выгрузки: снимок мог успеть включить клиента
+    stub = FakeCustomerStub(ids, on_stream=lambda: index.remove("cust_2"))
+    asyncio.run(index.refresh(stub))
+    assert index.tombstones == {"cust_2"}
+    assert not index.might_exist("cust_2")
+    assert not index.might_exist("cust_1")
+
+    ids.remove("cust_2")
+    asyncio.run(index.refresh(FakeCustomerStub(ids)))
+    assert index.tombstones == set()
+
+    index.remove("cust_3")
+    index.add("cust_3")
+    assert index.might_exist("cust_3")
+
+
+def test_existence_add_after_remove():
+    """Тест: подтверждение, полученное до удаления, не возвращает клиента в индекс"""
+    index = CustomerExistenceIndex(ttl=60, maxsize=100, bloom_enabled=True)
+    generation = index.generation
+    index.remove("cust_1")
+    index.add("cust_1", generation=generation)
+    assert not index.might_exist("cust_1")
+    assert index.tombstones == {"cust_1"}
+
+    index.add("cust_1", generation=index.generation)
+    assert index.might_exist("cust_1")
@@ -0,0 +1,138 @@
+import sys
+import os
+import asyncio
+import json
+import time
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("JWT_SECRET", "test-secret-for-the-gateway-unit-tests")
+
+import main
+import crm_pb2
+import jwt
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+
+class FakeOrderStub:
+    def __init__(self):
+        self.calls = 0
+
+    async def GetCustomerOrders(self, request):
+        self.calls += 1
+        return crm_pb2.OrderListResponse(
+            orders=[crm_pb2.Order(id=f"order_{request.page_token or 0}", customer_id=request.customer_id)],
+            next_page_token="next"
+        )
+
+
+class SlowCustomerStub:
+    """GetCustomer ждёт released, чтобы в это время успел пройти DELETE"""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.released = asyncio.Event()
+
+    async def GetCustomer(self, request):
+        self.started.set()
+        await self.released.wait()
+        return crm_pb2.CustomerResponse(customer=crm_pb2.Customer(id=request.id, name="Клиент"))
+
+    async def DeleteCustomer(self, request):
+        return crm_pb2.Empty()
+
+
+class CreatedOrderStub:
+    async def CreateOrder(self, request):
+        return crm_pb2.OrderResponse(order=crm_pb2.Order(id="order_1", customer_id=request.customer_id))
+
+
+def test_delete_during_order_existence_check(monkeypatch):
+    """Тест: клиент, удалённый во время GetCustomer в POST /orders, не считается существующим"""
+    customers = SlowCustomerStub()
+    index = main.CustomerExistenceIndex(ttl=60, maxsize=100)
+    monkeypatch.setattr(main, "customer_index", index)
+    monkeypatch.setattr(main, "get_customer_stub", lambda: customers)
+    monkeypatch.setattr(main, "get_order_stub", lambda: CreatedOrderStub())
+
+    async def scenario():
+        order = asyncio.create_task(main.create_order(main.OrderCreate(customer_id="c1", product_name="Ноутбук", price=1.0)))
+        await customers.started.wait()
+        await main.delete_customer("c1")
+        customers.released.set()
+        await order
+
+    asyncio.run(scenario())
+    assert not index.might_exist("c1")
+
+
+def get_orders(customer_id, cursor=None):
+    response = asyncio.run(main.get_orders_by_customer(
+        customer_id, limit=100, cursor=cursor, created_after=None, created_before=None, fields=None
+    ))
+    return json.loads(response.body)
+
+
+def test_orders_cache_pages(monkeypatch):
+    """Тест: страницы заказов кэшируются по отдельности, попадания считаются по страницам"""
+    stub = FakeOrderStub()
+    monkeypatch.setattr(main, "get_order_stub", lambda: stub)
+    monkeypatch.setattr(main, "orders_cache", main.LRUCache(maxsize=3, ttl=30))
+
+    get_orders("cust_1")
+    get_orders("cust_1", cursor="p2")
+    assert main.orders_cache.stats()["hits"] == 0
+    assert main.orders_cache.stats()["misses"] == 2
+
+    assert get_orders("cust_1", cursor="p2")["orders"][0]["id"] == "order_p2"
+    assert stub.calls == 2
+    assert main.orders_cache.hits == 1
+
+    get_orders("cust_2")
+    get_orders("cust_3")
+    assert len(main.orders_cache) == 3
+
+    main.orders_cache.pop_group("cust_1")
+    get_orders("cust_1", cursor="p2")
+    assert stub.calls == 5
+
+
+def make_token(exp):
+    return jwt.encode({"sub": "user", "exp": exp}, main.JWT_SECRET, algorithm=main.JWT_ALGORITHM)
+
+
+def verify(token):
+    return asyncio.run(main.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+
+def test_token_cache(monkeypatch):
+    """Тест: проверенный JWT берётся из кэша, запись живёт не дольше токена"""
+    now = [0.0]
+    monkeypatch.setattr(main, "token_cache", main.LRUCache(maxsize=10, ttl=300, clock=lambda: now[0]))
+    decode = jwt.decode
+    calls = []
+    monkeypatch.setattr(main.jwt, "decode", lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+
+    token = make_token(int(time.time()) + 60)
+    assert verify(token)["sub"] == "user"
+    assert verify(token)["sub"] == "user"
+    assert len(calls) == 1
+
+    now[0] = 61
+    verify(token)
+    assert len(calls) == 2
+
+
+def test_token_cache_rejects_invalid(monkeypatch):
+    """Тест: просроченный и поддельный токены не кэшируются"""
+    monkeypatch.setattr(main, "token_cache", main.LRUCache(maxsize=10, ttl=300))
+
+    for token, detail in [
+        (make_token(int(time.time()) - 10), "Token expired"),
+        (jwt.encode({"sub": "user"}, "another-secret-for-the-gateway-tests", algorithm="HS256"), "Invalid token"),
+    ]:
+        with pytest.raises(HTTPException) as error:
+            verify(token)
+        assert error.value.status_code == 401 and error.value.detail == detail
+    assert len(main.token_cache) == 0
@@ -0,0 +1,84 @@
+import sys
+import os
+import asyncio
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from importer import ImportErrors, ImportFormatError, CsvRows, csv_records, import_chunks, iter_lines, parse_ndjson
+
+
+async def byte_stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+def run_import(*chunks, csv_format=True):
+    """Разбирает поток байт так же, как POST /customers/import; возвращает строки и ошибки"""
+    async def scenario():
+        lines = iter_lines(byte_stream(*chunks))
+        if csv_format:
+            lines = csv_records(lines)
+            parse, first_row = CsvRows(await anext(lines)).parse, 2
+        else:
+            parse, first_row = parse_ndjson, 1
+        errors = ImportErrors()
+        batches = await collect(import_chunks(lines, parse, first_row, errors))
+        rows = [(r.row, r.name, r.email) for batch in batches for r in batch.rows]
+        return rows, errors
+    return asyncio.run(scenario())
+
+
+def test_iter_lines_split_chunks():
+    """Тест: строки собираются из кусков, BOM и \\r отбрасываются"""
+    lines = asyncio.run(collect(iter_lines(byte_stream("\ufeffa,b\r\nc".encode(), "d\nПри".encode()[:-1], "ри".encode()[-1:]))))
+    assert lines == ["a,b", "cd", "При"]
+
+
+def test_iter_lines_invalid_utf8():
+    """Тест: файл не в UTF-8"""
+    with pytest.raises(ImportFormatError):
+        asyncio.run(collect(iter_lines(byte_stream(b"\xff\xfe"))))
+
+
+def test_csv_import():
+    """Тест: CSV с лишними колонками, ошибками в строках и пустыми строками"""
+    rows, errors = run_import("id,Email,name\n1,ivan@email.ru,Иван\n\n2,x\n3,anna@email.ru,Anna\n".encode())
+    assert rows == [(2, "Иван", "ivan@email.ru"), (5, "Anna", "anna@email.ru")]
+    assert errors.items == [{"row": 4, "message": "expected 3 columns, got 2"}]
+
+
+def test_csv_quoted_newline():
+    """Тест: поле в кавычках с переводом строки остаётся одной записью"""
+    rows, errors = run_import(b'name,email\n"Dan\nJr",dan@x.ru\n"O""Neil, Pat",pat@x.ru\nO"Brien,ob@x.ru\n')
+    assert rows == [(2, "Dan\nJr", "dan@x.ru"), (3, 'O"Neil, Pat', "pat@x.ru"), (4, 'O"Brien', "ob@x.ru")]
+    assert errors.count == 0
+
+
+def test_csv_unterminated_quote():
+    """Тест: незакрытая кавычка в конце файла — ошибка формата, а не запись"""
+    rows, errors = run_import(b'name,email\nAnn,ann@x.ru\n"Dan,dan@x.ru\n')
+    assert rows == [(2, "Ann", "ann@x.ru")]
+    assert errors.fatal == "row 3: unterminated quoted field"
+
+
+def test_csv_header_without_columns():
+    """Тест: в заголовке нет name и email"""
+    with pytest.raises(ImportFormatError):
+        CsvRows("id,title")
+
+
+def test_ndjson_import():
+    """Тест: NDJSON с невалидными строками"""
+    rows, errors = run_import(
+        '{"name": "Иван", "email": "ivan@email.ru"}\nnot json\n[1]\n{"name": 1, "email": "a@b.ru"}\n'.encode(),
+        csv_format=False
+    )
+    assert rows == [(1, "Иван", "ivan@email.ru")]
+    assert [e["message"] for e in errors.items] == [
+        "invalid JSON", "expected a JSON object", "name and email must be strings"
+    ]
@@ -0,0 +1,58 @@
+import sys
+import os
+import json
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("JWT_SECRET", "test-secret-for-the-gateway-unit-tests")
+
+from fastapi import HTTPException
+from main import field_mask
+from serialization import customer_encoder, order_encoder, json_response
+import crm_pb2
+
+
+def make_customer(i):
+    return crm_pb2.Customer(id=f"cust_{i}", name=f"Клиент {i}", email=f"c{i}@email.ru", created_at="2025-01-01T00:00:00")
+
+
+def test_encoder_rows():
+    """Тест: все поля сообщения, включая значения по умолчанию"""
+    order = crm_pb2.Order(id="order_1", customer_id="cust_1", product_name="Ноутбук")
+    assert order_encoder.row(order) == {
+        "id": "order_1", "customer_id": "cust_1", "product_name": "Ноутбук", "price": 0.0, "created_at": ""
+    }
+    assert [row["id"] for row in customer_encoder.rows([make_customer(1), make_customer(2)])] == ["cust_1", "cust_2"]
+
+
+def test_encoder_ndjson_and_json_response():
+    """Тест: NDJSON по строке на сообщение, JSON без экранирования кириллицы"""
+    lines = customer_encoder.ndjson([make_customer(1), make_customer(2)]).decode().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Клиент 1", "Клиент 2"]
+
+    response = json_response({"name": "Клиент"}, status_code=201)
+    assert response.status_code == 201 and response.media_type == "application/json"
+    assert "Клиент" in response.body.decode()
+
+
+def test_field_mask():
+    """Тест: ?fields= сужает ответ в порядке полей сообщения и передаётся сервису как FieldMask"""
+    encoder, mask = field_mask(customer_encoder, None)
+    assert encoder is customer_encoder and mask is None
+
+    encoder, mask = field_mask(customer_encoder, " email, id ,")
+    assert encoder.fields == ("id", "email")
+    assert list(mask.paths) == ["id", "email"]
+    assert encoder.row(make_customer(1)) == {"id": "cust_1", "email": "c1@email.ru"}
+    assert field_mask(customer_encoder, "id,email")[0] is encoder
+
+    encoder, _ = field_mask(customer_encoder, "name")
+    assert encoder.rows([make_customer(1)]) == [{"name": "Клиент 1"}]
+
+
+@pytest.mark.parametrize("fields, detail", [("id,password", "Неизвестные поля: password"), (" , ", "Пустой список полей")])
+def test_field_mask_invalid(fields, detail):
+    """Тест: неизвестное поле или пустой список — 400"""
+    with pytest.raises(HTTPException) as error:
+        field_mask(customer_encoder, fields)
+    assert error.value.status_code == 400 and error.value.detail == detail
@@ -0,0 +1,92 @@
+"""Сжатие ответов gRPC: байты на проводе против CPU для списков клиентов и заказов
+
+Сжимает сериализованные CustomersListResponse и OrderListResponse так же, как
+gRPC (zlib, уровень по умолчанию; gzip и deflate отличаются только заголовком),
+и считает, при какой пропускной способности сети сжатие окупается.
+
+    python benchmarks/bench_compression.py --rows 10 100 1000 10000
+"""
+import argparse
+import random
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+# crm_pb2 шлюза: common добавляет api-gateway/app в sys.path
+from common import crm_pb2
+
+FIRST_NAMES = ["Иван", "Пётр", "Анна", "Мария", "Сергей", "Ольга", "Дмитрий", "Елена", "Алексей", "Наталья"]
+LAST_NAMES = ["Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Козлов", "Новиков", "Морозов"]
+PRODUCTS = ["Ноутбук", "Монитор", "Клавиатура", "Мышь", "Наушники", "Смартфон", "Планшет", "Принтер"]
+# wbits zlib: deflate в gRPC — zlib-поток, gzip — gzip-поток
+ALGORITHMS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def timestamp(rnd):
+    return (datetime(2024, 1, 1) + timedelta(seconds=rnd.randrange(60 * 60 * 24 * 365))).isoformat(timespec="microseconds")
+
+
+def customers_response(rows, rnd):
+    customers = []
+    for i in range(rows):
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        customers.append(crm_pb2.Customer(
+            id=f"cust_{uuid.UUID(int=rnd.getrandbits(128), version=4)}",
+            name=f"{first} {last}",
+            email=f"{first.lower()}.{i}@email.ru",
+            created_at=timestamp(rnd),
+        ))
+    return crm_pb2.CustomersListResponse(customers=customers, next_page_token="token")
+
+
+def orders_response(rows, rnd):
+    customer_id = f"cust_{uuid.UUID(int=rnd.getrandbits(128), version=4)}"
+    return crm_pb2.OrderListResponse(orders=[
+        crm_pb2.Order(
+            id=f"order_{uuid.UUID(int=rnd.getrandbits(128), version=4)}",
+            customer_id=customer_id,
+            product_name=rnd.choice(PRODUCTS),
+            price=round(rnd.uniform(100, 100000), 2),
+            created_at=timestamp(rnd),
+        )
+        for _ in range(rows)
+    ])
+
+
+def timed(repeat, call):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = call()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def compress(payload, wbits, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    return compressor.compress(payload) + compressor.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6])
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    print(f"{'ответ':<10} {'строк':>6} {'алгоритм':>12} {'байт':>10} {'доля':>6} "
+          f"{'сжатие, ms':>11} {'распаковка, ms':>15} {'окупается до, Мбит/с':>21}")
+    for name, build in (("customers", customers_response), ("orders", orders_response)):
+        for rows in args.rows:
+            payload = build(rows, rnd).SerializeToString()
+            repeat = max(1, 20000 // rows)
+            print(f"{name:<10} {rows:>6} {'none':>12} {len(payload):>10} {1:>6.2f}")
+            for algorithm, wbits in ALGORITHMS.items():
+                for level in args.levels:
+                    compressed, compress_time = timed(repeat, lambda: compress(payload, wbits, level))
+                    _, decompress_time = timed(repeat, lambda: zlib.decompress(compressed, wbits))
+                    saved_bits = (len(payload) - len(compressed)) * 8
+                    # Выше этой скорости сети сэкономленные байты передаются быстрее, чем тратится CPU
+                    break_even = saved_bits / (compress_time + decompress_time) / 1e6
+                    print(f"{name:<10} {rows:>6} {f'{algorithm}:{level}':>12} {len(compressed):>10} "
+                          f"{len(compressed) / len(payload):>6.2f} {compress_time * 1e3:>11.3f} "
+                          f"{decompress_time * 1e3:>15.3f} {break_even:>21.0f}")
@@ -0,0 +1,68 @@
+"""Сравнение канала на каждый запрос и пула долгоживущих каналов в шлюзе
+
+    python benchmarks/bench_gateway_channels.py --requests 2000
+"""
+import argparse
+import os
+import time
+
+import grpc
+from fastapi.testclient import TestClient
+
+from common import start_backends, load_gateway, report
+
+import crm_pb2_grpc
+
+
+def per_request_customer_stub():
+    return crm_pb2_grpc.CustomerServiceStub(grpc.aio.insecure_channel(os.environ["CUSTOMER_SERVICE_ADDRESSES"]))
+
+
+def per_request_order_stub():
+    return crm_pb2_grpc.OrderServiceStub(grpc.aio.insecure_channel(os.environ["ORDER_SERVICE_ADDRESSES"]))
+
+
+def run(client, headers, requests):
+    results = {}
+    for name, call in (
+        ("GET /customers", lambda: client.get("/customers", headers=headers)),
+        ("GET /orders/customer/{id}", lambda: client.get("/orders/customer/cust_00000001", headers=headers)),
+        ("POST /orders", lambda: client.post(
+            "/orders", headers=headers,
+            json={"customer_id": "cust_00000001", "product_name": "Ноутбук", "price": 500},
+        )),
+    ):
+        call()
+        started = time.perf_counter()
+        for _ in range(requests):
+            assert call().status_code == 200
+        results[name] = time.perf_counter() - started
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Без кэшей шлюза: иначе GET /orders/customer/{id} и проверка клиента в
+    # POST /orders после первого запроса не доходят до каналов
+    for name in ("ORDERS_CACHE_SIZE", "CUSTOMER_CACHE_SIZE", "CUSTOMER_INDEX_SIZE"):
+        os.environ[name] = "0"
+    server, _ = start_backends()
+    main = load_gateway()
+    pooled_customer_stub, pooled_order_stub = main.get_customer_stub, main.get_order_stub
+
+    with TestClient(main.app) as client:
+        headers = {"Authorization": f"Bearer {client.post('/register').json()['access_token']}"}
+
+        main.get_customer_stub, main.get_order_stub = per_request_customer_stub, per_request_order_stub
+        per_request = run(client, headers, args.requests)
+
+        main.get_customer_stub, main.get_order_stub = pooled_customer_stub, pooled_order_stub
+        pooled = run(client, headers, args.requests)
+
+    for name in per_request:
+        report(f"{name} (канал на запрос)", args.requests, per_request[name])
+        report(f"{name} (пул каналов)", args.requests, pooled[name])
+    server.stop(None)
@@ -0,0 +1,86 @@
+"""Стоимость логирования в GetCustomerOrders: print() против очереди с фоновой записью
+
+    python benchmarks/bench_logging.py --calls 20000
+
+Логи пишутся в /dev/null: замеряется только время в потоке RPC.
+Строка «print()» — прежние три print() на вызов; в потоке RPC при
+построчной буферизации stdout (терминал, PYTHONUNBUFFERED) это три write.
+"""
+import argparse
+import contextlib
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import load_service
+from bench_query_latency import seed
+
+
+def per_call(call, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--orders", type=int, default=20)
+    args = parser.parse_args()
+
+    main = load_service("order-service", f"sqlite:///{tempfile.mkdtemp()}/orders.db")
+    import crm_pb2
+    from database import Order, SessionLocal
+    from log import setup_logging
+
+    base = datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        seed(db, Order, args.orders, lambda i: {
+            "id": f"order_{i:09d}", "customer_id": "cust_1",
+            "product_name": "Ноутбук", "price": 500.0, "created_at": base + timedelta(seconds=i)
+        })
+
+    devnull = open(os.devnull, "w", buffering=1)
+    handler = setup_logging("order-service", stream=devnull)
+    logger = logging.getLogger("orders.server")
+    service = main.OrderService()
+    request = crm_pb2.GetCustomerOrdersRequest(customer_id="cust_1")
+
+    def rpc():
+        service.GetCustomerOrders(request, None)
+
+    def rpc_with_prints():
+        print(f"Получен запрос для customer_id: {request.customer_id}")
+        print(f"Поиск заказов для {request.customer_id}")
+        response = service.GetCustomerOrders(request, None)
+        print(f"Найдено заказов: {len(response.orders)}")
+
+    def debug_line():
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Найдено заказов", extra={"customer_id": request.customer_id, "orders": args.orders})
+
+    rows = []
+    logger.setLevel(logging.INFO)
+    baseline = per_call(rpc, args.calls)
+    rows.append(("DEBUG выключен", baseline))
+    with contextlib.redirect_stdout(devnull):
+        rows.append(("print() (до изменения)", per_call(rpc_with_prints, args.calls)))
+    logger.setLevel(logging.DEBUG)
+    rows.append(("DEBUG включён, очередь", per_call(rpc, args.calls)))
+    handler.filters[0].rate = 0.01
+    rows.append(("DEBUG, выборка 1%", per_call(rpc, args.calls)))
+
+    print(f"{'GetCustomerOrders, ' + str(args.orders) + ' заказов':<28} {'us/вызов':>10} {'логи, us':>10}")
+    for name, cost in rows:
+        print(f"{name:<28} {cost:>10.1f} {cost - baseline:>10.1f}")
+
+    handler.filters[0].rate = 1.0
+    logger.setLevel(logging.INFO)
+    off = per_call(debug_line, args.calls * 10)
+    logger.setLevel(logging.DEBUG)
+    on = per_call(debug_line, args.calls)
+    print(f"\nодна строка DEBUG: выключен {off * 1e3:.0f} нс, в очередь {on:.2f} us")
+    print(f"отброшено при переполнении очереди: {handler.dropped}")
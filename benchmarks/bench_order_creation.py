@@ -0,0 +1,63 @@
+"""Пропускная способность POST /orders с проверкой клиента на каждый заказ и с индексом существования
+
+    python benchmarks/bench_order_creation.py --orders 5000 --concurrency 100 --customers 200 --latency 0.002
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from common import FakeCustomerService, FakeOrderService, start_backends, load_gateway, report
+
+
+async def run(main, orders, concurrency, customers):
+    ids = [f"cust_{i:08d}" for i in range(customers)]
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            token = (await client.post("/register")).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            queue = asyncio.Queue()
+            for _ in range(orders):
+                queue.put_nowait(random.choice(ids))
+
+            async def worker():
+                while not queue.empty():
+                    customer_id = queue.get_nowait()
+                    response = await client.post("/orders", headers=headers, json={
+                        "customer_id": customer_id, "product_name": "Ноутбук", "price": 500
+                    })
+                    assert response.status_code == 200
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002, help="задержка каждого gRPC-вызова, с")
+    args = parser.parse_args()
+
+    customer_service = FakeCustomerService(latency=args.latency)
+    server, _ = start_backends(customer_service, FakeOrderService(latency=args.latency), workers=args.concurrency * 2)
+    main = load_gateway()
+
+    might_exist = main.customer_index.might_exist
+    main.customer_index.might_exist = lambda customer_id: False
+    before = asyncio.run(run(main, args.orders, args.concurrency, args.customers))
+    calls_before = customer_service.calls
+
+    main.customer_index.might_exist = might_exist
+    main.customer_index.known.clear()
+    after = asyncio.run(run(main, args.orders, args.concurrency, args.customers))
+
+    report("POST /orders (GetCustomer на каждый заказ)", args.orders, before)
+    report("POST /orders (индекс существования)", args.orders, after)
+    print(f"вызовов GetCustomer: {calls_before} -> {customer_service.calls - calls_before}")
+    server.stop(None)
@@ -0,0 +1,53 @@
+"""Ответ GET /customers: dict + jsonable_encoder + json против прямого кодирования protobuf в JSON
+
+    python benchmarks/bench_serialization.py --rows 10000 100000
+"""
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from common import make_customer
+
+import crm_pb2
+from serialization import customer_encoder, json_response
+
+
+def baseline(response):
+    customers = [
+        {"id": c.id, "name": c.name, "email": c.email, "created_at": c.created_at}
+        for c in response.customers
+    ]
+    return JSONResponse(jsonable_encoder({"customers": customers, "next_cursor": None})).body
+
+
+def fast_path(response):
+    return json_response({
+        "customers": customer_encoder.rows(response.customers),
+        "next_cursor": None
+    }).body
+
+
+def measure(encode, response, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(response)
+        best = min(best, time.perf_counter() - started)
+    return best, len(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        response = crm_pb2.CustomersListResponse(customers=[make_customer(i) for i in range(rows)])
+        assert json.loads(baseline(response)) == json.loads(fast_path(response))
+        for name, encode in (("dict + jsonable_encoder + json", baseline), ("protobuf -> JSON bytes", fast_path)):
+            elapsed, size = measure(encode, response, args.repeat)
+            print(f"{rows:>8} строк  {name:<32} {elapsed * 1000:>9.1f} ms  {size / 1e6:>7.2f} MB")
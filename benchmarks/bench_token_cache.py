@@ -0,0 +1,43 @@
+"""Накладные расходы авторизации на запрос: jwt.decode против кэша проверенных токенов
+
+    python benchmarks/bench_token_cache.py --requests 100000
+"""
+import argparse
+import asyncio
+import time
+
+import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+
+from common import load_gateway
+
+
+def decode_only(main, token, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        jwt.decode(token, main.JWT_SECRET, algorithms=[main.JWT_ALGORITHM])
+    return time.perf_counter() - started
+
+
+async def cached(main, credentials, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        await main.verify_token(credentials)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+
+    main = load_gateway()
+    token = asyncio.run(main.register("bench"))["access_token"]
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    without_cache = decode_only(main, token, args.requests)
+    with_cache = asyncio.run(cached(main, credentials, args.requests))
+
+    print(f"jwt.decode на каждый запрос: {without_cache / args.requests * 1e6:8.2f} us/req")
+    print(f"кэш проверенных токенов:     {with_cache / args.requests * 1e6:8.2f} us/req")
+    print(f"статистика кэша: {main.token_cache.stats()}")
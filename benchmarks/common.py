@@ -0,0 +1,159 @@
+"""Общие помощники для бенчмарков: фейковые gRPC-бэкенды и загрузка шлюза"""
+import os
+import sys
+import time
+from concurrent import futures
+
+import grpc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATEWAY_APP = os.path.join(ROOT, "api-gateway", "app")
+
+sys.path.insert(0, GATEWAY_APP)
+
+import crm_pb2
+import crm_pb2_grpc
+
+
+def make_customer(i):
+    return crm_pb2.Customer(
+        id=f"cust_{i:08d}",
+        name=f"Клиент {i}",
+        email=f"customer{i}@email.ru",
+        created_at="2025-01-01T00:00:00.000000",
+    )
+
+
+def make_order(i, customer_id="cust_00000001"):
+    return crm_pb2.Order(
+        id=f"order_{i:08d}",
+        customer_id=customer_id,
+        product_name=f"Товар {i % 100}",
+        price=float(i % 1000) + 0.99,
+        created_at="2025-01-01T00:00:00.000000",
+    )
+
+
+class FakeCustomerService(crm_pb2_grpc.CustomerServiceServicer):
+    def __init__(self, rows=100, latency=0.0):
+        self.customers = [make_customer(i) for i in range(rows)]
+        self.latency = latency
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def GetCustomer(self, request, context):
+        self._call()
+        return crm_pb2.CustomerResponse(customer=crm_pb2.Customer(id=request.id, name="Клиент", email="c@email.ru"))
+
+    def BatchGetCustomers(self, request, context):
+        self._call()
+        return crm_pb2.BatchGetCustomersResponse(
+            customers=[crm_pb2.Customer(id=customer_id, name="Клиент", email="c@email.ru") for customer_id in request.ids]
+        )
+
+    def SearchCustomers(self, request, context):
+        self._call()
+        return crm_pb2.SearchCustomersResponse(customers=self.customers[:request.limit or 20])
+
+    def CreateCustomer(self, request, context):
+        self._call()
+        return crm_pb2.CustomerResponse(customer=crm_pb2.Customer(id="cust_new", name=request.name, email=request.email))
+
+    def UpdateCustomer(self, request, context):
+        self._call()
+        return crm_pb2.CustomerResponse(customer=crm_pb2.Customer(id=request.id, name=request.name, email=request.email))
+
+    def DeleteCustomer(self, request, context):
+        self._call()
+        return crm_pb2.Empty()
+
+    def ListCustomers(self, request, context):
+        self._call()
+        return crm_pb2.CustomersListResponse(customers=self.customers)
+
+    def StreamCustomers(self, request, context):
+        self._call()
+        yield from self.customers
+
+
+class FakeOrderService(crm_pb2_grpc.OrderServiceServicer):
+    def __init__(self, rows=100, latency=0.0):
+        self.orders = [make_order(i) for i in range(rows)]
+        self.latency = latency
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def CreateOrder(self, request, context):
+        self._call()
+        return crm_pb2.OrderResponse(order=crm_pb2.Order(
+            id="order_new",
+            customer_id=request.customer_id,
+            product_name=request.product_name,
+            price=request.price,
+        ))
+
+    def CreateOrders(self, request_iterator, context):
+        self._call()
+        return crm_pb2.CreateOrdersResponse(results=[
+            crm_pb2.OrderResult(order=crm_pb2.Order(
+                id=f"order_{i:08d}",
+                customer_id=request.customer_id,
+                product_name=request.product_name,
+                price=request.price,
+            ))
+            for i, request in enumerate(request_iterator)
+        ])
+
+    def GetCustomerOrders(self, request, context):
+        self._call()
+        return crm_pb2.OrderListResponse(orders=self.orders)
+
+
+def start_backends(customer_service=None, order_service=None, workers=32):
+    """Поднимает фейковые сервисы на свободных портах и прописывает адреса для шлюза"""
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers))
+    crm_pb2_grpc.add_CustomerServiceServicer_to_server(customer_service or FakeCustomerService(), server)
+    crm_pb2_grpc.add_OrderServiceServicer_to_server(order_service or FakeOrderService(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    os.environ["CUSTOMER_SERVICE_ADDRESSES"] = f"127.0.0.1:{port}"
+    os.environ["ORDER_SERVICE_ADDRESSES"] = f"127.0.0.1:{port}"
+    return server, f"127.0.0.1:{port}"
+
+
+def load_service(service_dir, database_url=None, migrate=True):
+    """Импортирует main.py сервиса; шлюз в том же процессе загружать нельзя"""
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, os.path.join(ROOT, service_dir, "app"))
+    import main
+    if migrate:
+        import migrations
+        migrations.migrate()
+    return main
+
+
+def serve_in_process(add_servicer, servicer, workers=16):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers))
+    add_servicer(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, grpc.insecure_channel(f"127.0.0.1:{port}")
+
+
+def load_gateway():
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    import main
+    return main
+
+
+def report(name, count, elapsed):
+    print(f"{name:<48} {count / elapsed:>12.1f} req/s {elapsed / count * 1e6:>10.1f} us/req")
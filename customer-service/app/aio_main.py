@@ -0,0 +1,285 @@
+"""customer-service на grpc.aio и асинхронном SQLAlchemy (SERVER_MODE=aio).
+
+Семантика RPC та же, что у CustomerService из main.py; число одновременно
+работающих с БД запросов ограничивает пул соединений, а не пул потоков.
+"""
+import asyncio
+import logging
+import os
+
+import grpc
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import crm_pb2
+import crm_pb2_grpc
+import queries
+from bulk import ImportResult, copy_errors, prepare_rows, insert_customers_async
+from cache import CustomerCache
+from compression import AsyncCompressionInterceptor
+from database import DATABASE_URL, async_database_url, create_async_db_engine, pool_metrics
+from log import log_metrics, setup_logging
+from main import (
+    CUSTOMER_CACHE_MAX_ENTRIES, CUSTOMER_CACHE_MAX_BYTES, CUSTOMER_CACHE_TTL,
+    SEARCH_INDEX_REFRESH_INTERVAL, SERVER_OPTIONS, GRPC_PORT
+)
+from pagination import page_size, decode_page_token
+from search import MIN_QUERY_LENGTH, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, TrigramIndex, normalize, rank
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+logger = logging.getLogger("customers.server")
+
+
+class AsyncCustomerService(crm_pb2_grpc.CustomerServiceServicer):
+    def __init__(self, engine=None):
+        self.engine = engine or create_async_db_engine(ASYNC_DATABASE_URL)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.cache = CustomerCache(CUSTOMER_CACHE_MAX_ENTRIES, CUSTOMER_CACHE_MAX_BYTES, CUSTOMER_CACHE_TTL)
+        self.search_index = TrigramIndex()
+        # Ссылку на задачу держим до остановки сервиса, иначе её соберёт GC
+        self.refresh_task = None
+
+
+    async def start(self):
+        """С GIN-индексами pg_trgm ищет PostgreSQL, иначе индекс в памяти процесса"""
+        if self.engine.dialect.name == "postgresql":
+            async with self.engine.connect() as conn:
+                if (await conn.execute(queries.PG_TRGM_INDEXED)).first() is not None:
+                    self.search_index = None
+
+
+    async def stop(self):
+        task, self.refresh_task = self.refresh_task, None
+        if task is not None:
+            # Дожидаемся отмены, чтобы пересборка не брала соединения у закрытого движка
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.engine.dispose()
+
+
+    async def refresh_search_index(self):
+        fresh = TrigramIndex()
+        self.search_index.start_rebuild()
+        try:
+            async with self.get_db() as db:
+                result = await db.stream(queries.customer_texts())
+                async for rows in result.partitions():
+                    # Разбор строк в отдельном потоке, чтобы не останавливать event loop
+                    await asyncio.to_thread(fresh.add_many, rows)
+        except BaseException:
+            self.search_index.abort_rebuild()
+            raise
+        self.search_index.swap(fresh)
+
+
+    async def run_search_index_refresh(self):
+        while True:
+            try:
+                await self.refresh_search_index()
+            except SQLAlchemyError as e:
+                logger.error("Ошибка пересборки поискового индекса", extra={"error": str(e)})
+            await asyncio.sleep(SEARCH_INDEX_REFRESH_INTERVAL)
+
+
+    def index_customer(self, customer_id, name, email):
+        if self.search_index is not None:
+            self.search_index.add(customer_id, name, email)
+
+
+    def get_db(self):
+        # Выход из async with закрывает сессию: незакоммиченное откатывается, соединение возвращается в пул
+        return self.sessions()
+
+
+    async def CreateCustomer(self, request, context):
+        async with self.get_db() as db:
+            customer = queries.new_customer(request.name, request.email)
+            db.add(customer)
+            await db.commit()
+            await db.refresh(customer)
+            message = queries.customer_message(customer)
+        self.index_customer(message.id, message.name, message.email)
+        return crm_pb2.CustomerResponse(customer=message)
+
+
+    async def GetCustomer(self, request, context):
+        try:
+            fields = queries.customer_fields(request.fields)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        cached = self.cache.get(request.id)
+        if cached is not None:
+            message = crm_pb2.Customer.FromString(cached)
+            return crm_pb2.CustomerResponse(customer=queries.mask_customer(message, fields))
+
+        generation = self.cache.generation
+        async with self.get_db() as db:
+            customer = (await db.execute(queries.get_customer(request.id))).scalar()
+        if not customer:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Customer not found")
+
+        message = queries.customer_message(customer)
+        self.cache.set(request.id, message.SerializeToString(), generation)
+        return crm_pb2.CustomerResponse(customer=queries.mask_customer(message, fields))
+
+
+    async def fetch_customers(self, ids):
+        found = {}
+        pending = []
+        for customer_id in ids:
+            cached = self.cache.get(customer_id)
+            if cached is not None:
+                found[customer_id] = crm_pb2.Customer.FromString(cached)
+            else:
+                pending.append(customer_id)
+
+        if pending:
+            generation = self.cache.generation
+            async with self.get_db() as db:
+                for query in queries.customers_by_ids(pending):
+                    for row in await db.execute(query):
+                        message = queries.customer_row_message(row)
+                        found[message.id] = message
+                        self.cache.set(message.id, message.SerializeToString(), generation)
+        return found
+
+
+    async def BatchGetCustomers(self, request, context):
+        ids = list(dict.fromkeys(request.ids))
+        if len(ids) > queries.MAX_BATCH_GET_IDS:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"At most {queries.MAX_BATCH_GET_IDS} ids per request")
+
+        found = await self.fetch_customers(ids)
+        return crm_pb2.BatchGetCustomersResponse(
+            customers=[found[c] for c in ids if c in found],
+            missing_ids=[c for c in ids if c not in found]
+        )
+
+
+    async def SearchCustomers(self, request, context):
+        query = normalize(request.query)
+        if len(query) < MIN_QUERY_LENGTH:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"query must be at least {MIN_QUERY_LENGTH} characters")
+        limit = min(request.limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+
+        if self.search_index is not None and self.search_index.ready:
+            ids = self.search_index.search(query, limit)
+        else:
+            async with self.get_db() as db:
+                if self.search_index is None:
+                    ids = list((await db.execute(queries.PG_SEARCH, queries.search_pg_params(query, limit))).scalars())
+                else:
+                    rows = await db.execute(queries.search_like(query))
+                    ids = rank(query, [tuple(row) for row in rows])[:limit]
+
+        found = await self.fetch_customers(ids)
+        return crm_pb2.SearchCustomersResponse(customers=[found[c] for c in ids if c in found])
+
+
+    async def ListCustomers(self, request, context):
+        try:
+            limit = page_size(request.page_size)
+            after = decode_page_token(request.page_token) if request.page_token else None
+            fields = queries.customer_fields(request.fields)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        async with self.get_db() as db:
+            customers = (await db.execute(queries.list_customers(after, limit, fields))).all()
+        return queries.customers_page(customers, limit, fields)
+
+
+    async def StreamCustomers(self, request, context):
+        async with self.get_db() as db:
+            result = await db.stream(queries.stream_customers(request.batch_size))
+            async for row in result:
+                yield queries.customer_row_message(row)
+
+
+    async def ImportCustomers(self, request_iterator, context):
+        result = ImportResult()
+        async with self.get_db() as db:
+            db_errors = (SQLAlchemyError, *copy_errors(db.get_bind().dialect))
+            async for chunk in request_iterator:
+                row_numbers, rows = prepare_rows(chunk, result)
+                if not rows:
+                    continue
+                try:
+                    await insert_customers_async(db, rows)
+                    await db.commit()
+                except db_errors as e:
+                    await db.rollback()
+                    result.fail_rows(row_numbers, e)
+                    continue
+                result.imported += len(rows)
+                for row in rows:
+                    self.index_customer(row["id"], row["name"], row["email"])
+
+        return result.response()
+
+
+    async def UpdateCustomer(self, request, context):
+        values = queries.customer_changes(request)
+        if not values:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "name or email is required")
+
+        async with self.get_db() as db:
+            generation = self.cache.invalidate(request.id)
+            row = (await db.execute(queries.update_customer(request.id, values))).first()
+
+            if row is None:
+                await context.abort(grpc.StatusCode.NOT_FOUND, "Customer not found")
+
+            await db.commit()
+        message = queries.customer_row_message(row)
+        self.cache.write(request.id, message.SerializeToString(), generation)
+        self.index_customer(message.id, message.name, message.email)
+        return crm_pb2.CustomerResponse(customer=message)
+
+
+    async def DeleteCustomer(self, request, context):
+        async with self.get_db() as db:
+            self.cache.invalidate(request.id)
+            deleted = (await db.execute(queries.delete_customer(request.id))).rowcount
+
+            if not deleted:
+                await context.abort(grpc.StatusCode.NOT_FOUND, "Customer not found")
+
+            await db.commit()
+        self.cache.invalidate(request.id)
+        if self.search_index is not None:
+            self.search_index.remove(request.id)
+        return crm_pb2.Empty()
+
+
+    async def GetMetrics(self, request, context):
+        values = pool_metrics(self.engine)
+        values.update(self.cache.stats())
+        values.update(log_metrics())
+        return crm_pb2.MetricsResponse(values=values)
+
+
+async def serve():
+    setup_logging("customer-service")
+    server = grpc.aio.server(options=SERVER_OPTIONS, interceptors=[AsyncCompressionInterceptor()])
+    service = AsyncCustomerService()
+    await service.start()
+    if service.search_index is not None:
+        service.refresh_task = asyncio.create_task(service.run_search_index_refresh())
+    crm_pb2_grpc.add_CustomerServiceServicer_to_server(service, server)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    logger.info("Customer Service (grpc.aio) запущен", extra={"port": GRPC_PORT})
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await service.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(serve())
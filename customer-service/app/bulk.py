@@ -0,0 +1,108 @@
+import csv
+import io
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+import crm_pb2
+from database import Customer
+
+MAX_NAME_LENGTH = 255
+MAX_EMAIL_LENGTH = 320
+MAX_IMPORT_ERRORS = 1000
+
+
+def validate_customer(name, email):
+    """Возвращает текст ошибки или None, если строку можно импортировать"""
+    if not name.strip():
+        return "name is required"
+    if len(name) > MAX_NAME_LENGTH:
+        return "name is too long"
+    local, _, domain = email.strip().partition("@")
+    if not local or not domain:
+        return "email is invalid"
+    if len(email) > MAX_EMAIL_LENGTH:
+        return "email is too long"
+    return None
+
+
+class ImportResult:
+    """Счётчики импорта: ошибки считаются все, в ответ уходят первые MAX_IMPORT_ERRORS"""
+
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row, message):
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append(crm_pb2.RowError(row=row, message=message))
+
+    def fail_rows(self, row_numbers, error):
+        for row in row_numbers:
+            self.fail(row, f"insert failed: {error.__class__.__name__}")
+
+    def response(self):
+        return crm_pb2.ImportCustomersResponse(imported=self.imported, failed=self.failed, errors=self.errors)
+
+
+def prepare_rows(chunk, result):
+    """Проверяет строки пачки; возвращает номера строк и значения для вставки"""
+    row_numbers = []
+    rows = []
+    for r in chunk.rows:
+        error = validate_customer(r.name, r.email)
+        if error:
+            result.fail(r.row, error)
+            continue
+        row_numbers.append(r.row)
+        rows.append({
+            "id": f"cust_{uuid.uuid4()}",
+            "name": r.name.strip(),
+            "email": r.email.strip(),
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+        })
+    return row_numbers, rows
+
+
+def copy_errors(dialect):
+    """Ошибки, которые COPY бросает напрямую из драйвера, мимо SQLAlchemy"""
+    if dialect.driver == "asyncpg":
+        import asyncpg
+        return (asyncpg.PostgresError, asyncpg.InterfaceError)
+    return (dialect.loaded_dbapi.Error,)
+
+
+def insert_customers(db, rows):
+    """Вставляет пачку строк: COPY в PostgreSQL, иначе один executemany INSERT"""
+    if db.get_bind().dialect.name == "postgresql":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow((row["id"], row["name"], row["email"], row["created_at"].isoformat()))
+        buffer.seek(0)
+        table = Customer.__table__.name
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY "{table}" (id, name, email, created_at) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+    else:
+        db.execute(insert(Customer), rows)
+
+
+async def insert_customers_async(db, rows):
+    """То же для AsyncSession: COPY через asyncpg, иначе executemany INSERT"""
+    if db.get_bind().dialect.name == "postgresql":
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Customer.__table__.name,
+            records=[(row["id"], row["name"], row["email"], row["created_at"]) for row in rows],
+            columns=["id", "name", "email", "created_at"]
+        )
+    else:
+        await db.execute(insert(Customer), rows)
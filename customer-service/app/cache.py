@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CustomerCache:
+    """LRU сериализованных Customer с ограничением по числу записей и по байтам.
+
+    RPC выполняются в пуле потоков, поэтому все операции под блокировкой.
+    generation растёт при каждом изменении клиента: чтение из БД, начатое
+    до изменения, передаёт старое значение в set() и не кладёт в кэш
+    устаревшие данные.
+
+    generation защищает только от изменений в этом процессе. Изменения через
+    другие реплики сервиса сюда не доходят, поэтому у каждой записи есть срок
+    жизни ttl: дольше него реплика не отдаёт удалённого или изменённого клиента.
+    """
+
+    def __init__(self, max_entries, max_bytes, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= self._clock():
+                self._discard(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation):
+        with self._lock:
+            if generation == self.generation:
+                self._store(key, value)
+
+    def invalidate(self, key):
+        """Удаляет запись и возвращает новое поколение для последующего write()"""
+        with self._lock:
+            self.generation += 1
+            self._discard(key)
+            return self.generation
+
+    def write(self, key, value, generation):
+        """Write-through после коммита: если с invalidate() ничего не менялось, кладёт новое значение"""
+        with self._lock:
+            if generation == self.generation:
+                self._store(key, value)
+            else:
+                self._discard(key)
+            self.generation += 1
+
+    def _store(self, key, value):
+        if len(value) > self.max_bytes or self.max_entries <= 0:
+            return
+        self._discard(key)
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self.bytes += len(value)
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            _, (evicted, _) = self._data.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def _discard(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes -= len(item[0])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "customer_cache.size": len(self._data),
+                "customer_cache.bytes": self.bytes,
+                "customer_cache.max_entries": self.max_entries,
+                "customer_cache.max_bytes": self.max_bytes,
+                "customer_cache.hits": self.hits,
+                "customer_cache.misses": self.misses,
+                "customer_cache.hit_ratio": self.hits / lookups if lookups else 0.0,
+                "customer_cache.evictions": self.evictions,
+                "customer_cache.expirations": self.expirations,
+            }
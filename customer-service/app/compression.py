@@ -0,0 +1,111 @@
+"""Сжатие ответов и лимиты размера сообщений gRPC; одинаковый модуль в обоих сервисах.
+
+Сообщение сжимается, только если оно больше GRPC_COMPRESSION_THRESHOLD байт:
+на маленьких сообщениях gzip тратит CPU и почти не экономит трафик.
+В потоковых ответах порог проверяется для каждого сообщения отдельно.
+Методы из skip (ответы уже сжаты, например выгрузка заказов) не сжимаются.
+"""
+import os
+
+import grpc
+
+ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def compression_algorithm():
+    name = os.getenv("GRPC_COMPRESSION", "gzip").strip().lower()
+    if name not in ALGORITHMS:
+        raise RuntimeError(f"GRPC_COMPRESSION must be one of: {', '.join(ALGORITHMS)}")
+    return ALGORITHMS[name]
+
+
+def compression_threshold():
+    return int(os.getenv("GRPC_COMPRESSION_THRESHOLD", "32768"))
+
+
+def message_size_options():
+    return [
+        ("grpc.max_send_message_length", int(os.getenv("GRPC_MAX_SEND_MESSAGE_BYTES", str(MAX_MESSAGE_BYTES)))),
+        ("grpc.max_receive_message_length", int(os.getenv("GRPC_MAX_RECEIVE_MESSAGE_BYTES", str(MAX_MESSAGE_BYTES)))),
+    ]
+
+
+class _Compression:
+    def __init__(self, algorithm=None, threshold=None, skip=()):
+        self.algorithm = compression_algorithm() if algorithm is None else algorithm
+        self.threshold = compression_threshold() if threshold is None else threshold
+        self.enabled = self.algorithm != grpc.Compression.NoCompression
+        self.skip = frozenset(skip)
+
+    def skips(self, handler_call_details):
+        return bool(self.skip) and handler_call_details.method in self.skip
+
+    def apply(self, response, context):
+        if response is not None and response.ByteSize() >= self.threshold:
+            context.set_compression(self.algorithm)
+        return response
+
+    def apply_stream(self, response, context):
+        if response.ByteSize() < self.threshold:
+            context.disable_next_message_compression()
+        return response
+
+
+class CompressionInterceptor(grpc.ServerInterceptor, _Compression):
+    """Для grpc.server: выбирает сжатие по размеру готового ответа"""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or not self.enabled or self.skips(handler_call_details):
+            return handler
+        if handler.unary_unary:
+            behavior = handler.unary_unary
+            return handler._replace(unary_unary=lambda request, context: self.apply(behavior(request, context), context))
+        if handler.stream_unary:
+            behavior = handler.stream_unary
+            return handler._replace(stream_unary=lambda requests, context: self.apply(behavior(requests, context), context))
+        if handler.unary_stream:
+            behavior = handler.unary_stream
+
+            def unary_stream(request, context):
+                context.set_compression(self.algorithm)
+                for response in behavior(request, context):
+                    yield self.apply_stream(response, context)
+            return handler._replace(unary_stream=unary_stream)
+        return handler
+
+
+class AsyncCompressionInterceptor(grpc.aio.ServerInterceptor, _Compression):
+    """То же для grpc.aio.server"""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or not self.enabled or self.skips(handler_call_details):
+            return handler
+        if handler.unary_unary:
+            behavior = handler.unary_unary
+
+            async def unary_unary(request, context):
+                return self.apply(await behavior(request, context), context)
+            return handler._replace(unary_unary=unary_unary)
+        if handler.stream_unary:
+            behavior = handler.stream_unary
+
+            async def stream_unary(requests, context):
+                return self.apply(await behavior(requests, context), context)
+            return handler._replace(stream_unary=stream_unary)
+        if handler.unary_stream:
+            behavior = handler.unary_stream
+
+            async def unary_stream(request, context):
+                context.set_compression(self.algorithm)
+                async for response in behavior(request, context):
+                    yield self.apply_stream(response, context)
+            return handler._replace(unary_stream=unary_stream)
+        return handler
@@ -0,0 +1,31 @@
+"""FieldMask на чтениях: сужает и SELECT, и ответ; одинаковый модуль в обоих сервисах"""
+from datetime import datetime
+
+
+def mask_fields(mask, columns):
+    """Запрошенные поля в порядке columns; None — маска пуста, нужны все поля"""
+    if not mask.paths:
+        return None
+    names = [column.name for column in columns]
+    paths = set(mask.paths)
+    unknown = sorted(paths.difference(names))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(name for name in names if name in paths)
+
+
+def projection(columns, fields, required=()):
+    """Колонки SELECT: запрошенные поля и те, что нужны серверу (например, для курсора)"""
+    if fields is None:
+        return tuple(columns)
+    keep = set(fields).union(required)
+    return tuple(column for column in columns if column.name in keep)
+
+
+def masked_message(message_class, fields, source):
+    """Сообщение только с полями fields из строки БД или другого сообщения"""
+    values = {}
+    for name in fields:
+        value = getattr(source, name)
+        values[name] = value.isoformat() if isinstance(value, datetime) else value
+    return message_class(**values)
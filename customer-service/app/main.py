@@ -1,125 +1,293 @@
 import grpc
 from concurrent import futures
+import logging
 import sys
 import os
-from datetime import datetime, timezone
-from database import SessionLocal, Base, Customer
-import uuid
+from database import engine, pool_metrics, session_scope
+from pagination import page_size, decode_page_token
+from bulk import ImportResult, copy_errors, prepare_rows, insert_customers
+from cache import CustomerCache
+from compression import CompressionInterceptor, message_size_options
+from log import log_metrics, setup_logging
+from search import MIN_QUERY_LENGTH, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, TrigramIndex, normalize, rank
+import queries
+from sqlalchemy.exc import SQLAlchemyError
+import asyncio
+import threading
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import crm_pb2
 import crm_pb2_grpc
 
+logger = logging.getLogger("customers.server")
+
+CUSTOMER_CACHE_MAX_ENTRIES = int(os.getenv("CUSTOMER_CACHE_MAX_ENTRIES", "100000"))
+CUSTOMER_CACHE_MAX_BYTES = int(os.getenv("CUSTOMER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CUSTOMER_CACHE_TTL = float(os.getenv("CUSTOMER_CACHE_TTL", "30"))
+SEARCH_INDEX_REFRESH_INTERVAL = float(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", "300"))
+
 class CustomerService(crm_pb2_grpc.CustomerServiceServicer):
     def __init__(self):
-        Base.metadata.create_all(bind=SessionLocal().get_bind())
+        self.cache = CustomerCache(CUSTOMER_CACHE_MAX_ENTRIES, CUSTOMER_CACHE_MAX_BYTES, CUSTOMER_CACHE_TTL)
+        # С GIN-индексами pg_trgm ищет PostgreSQL, иначе индекс в памяти процесса
+        self.search_index = None if self.has_pg_trgm() else TrigramIndex()
+
+
+    def has_pg_trgm(self):
+        if engine.dialect.name != "postgresql":
+            return False
+        with engine.connect() as conn:
+            return conn.execute(queries.PG_TRGM_INDEXED).first() is not None
+
+
+    def refresh_search_index(self):
+        # Запись до начала чтения снимка должна попасть в него или в повтор при swap()
+        fresh = TrigramIndex()
+        self.search_index.start_rebuild()
+        try:
+            with self.get_db() as db:
+                fresh.add_many(db.execute(queries.customer_texts()))
+        except BaseException:
+            self.search_index.abort_rebuild()
+            raise
+        self.search_index.swap(fresh)
+
+
+    def run_search_index_refresh(self):
+        """Пересборка индекса в фоне: так в него попадают и записи других реплик"""
+        while True:
+            try:
+                self.refresh_search_index()
+            except SQLAlchemyError as e:
+                logger.error("Ошибка пересборки поискового индекса", extra={"error": str(e)})
+            time.sleep(SEARCH_INDEX_REFRESH_INTERVAL)
+
+
+    def index_customer(self, customer_id, name, email):
+        if self.search_index is not None:
+            self.search_index.add(customer_id, name, email)
 
 
     def get_db(self):
-        db = SessionLocal()
-        try: return db
-        finally: db.close()
+        return session_scope()
 
 
     def CreateCustomer(self, request, context):
-        db = self.get_db()
-        customer_id = f"cust_{uuid.uuid4()}"
-
-        customer = Customer(
-            id=customer_id,
-            name=request.name,
-            email=request.email
-        )
+        with self.get_db() as db:
+            customer = queries.new_customer(request.name, request.email)
+            db.add(customer)
+            db.commit()
+            db.refresh(customer)
+            message = queries.customer_message(customer)
+        self.index_customer(message.id, message.name, message.email)
+        return crm_pb2.CustomerResponse(customer=message)
 
-        db.add(customer)
-        db.commit()
-        db.refresh(customer)
-
-        return crm_pb2.CustomerResponse(
-            customer=crm_pb2.Customer(
-                id=customer.id,
-                name=customer.name,
-                email=customer.email,
-                created_at=customer.created_at.isoformat()
-            )
-        )
-    
 
     def GetCustomer(self, request, context):
-        db = self.get_db()
-        customer = db.query(Customer).filter(Customer.id == request.id).first()
+        try:
+            fields = queries.customer_fields(request.fields)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            return
+
+        # Кэш хранит клиента целиком, маска применяется к ответу
+        cached = self.cache.get(request.id)
+        if cached is not None:
+            message = crm_pb2.Customer.FromString(cached)
+            return crm_pb2.CustomerResponse(customer=queries.mask_customer(message, fields))
+
+        generation = self.cache.generation
+        with self.get_db() as db:
+            customer = db.execute(queries.get_customer(request.id)).scalar()
+
+            if not customer:
+                context.abort(grpc.StatusCode.NOT_FOUND, "Customer not found")
+                return
+
+            message = queries.customer_message(customer)
+        self.cache.set(request.id, message.SerializeToString(), generation)
+        return crm_pb2.CustomerResponse(customer=queries.mask_customer(message, fields))
 
-        if not customer:
-            context.abort(404, "Customer not found")
+
+    def fetch_customers(self, ids):
+        """Клиенты по ID: сначала из кэша, остальные запросами IN (...) по частям"""
+        found = {}
+        pending = []
+        for customer_id in ids:
+            cached = self.cache.get(customer_id)
+            if cached is not None:
+                found[customer_id] = crm_pb2.Customer.FromString(cached)
+            else:
+                pending.append(customer_id)
+
+        if pending:
+            generation = self.cache.generation
+            with self.get_db() as db:
+                for query in queries.customers_by_ids(pending):
+                    for row in db.execute(query):
+                        message = queries.customer_row_message(row)
+                        found[message.id] = message
+                        self.cache.set(message.id, message.SerializeToString(), generation)
+        return found
+
+
+    def BatchGetCustomers(self, request, context):
+        ids = list(dict.fromkeys(request.ids))
+        if len(ids) > queries.MAX_BATCH_GET_IDS:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"At most {queries.MAX_BATCH_GET_IDS} ids per request")
             return
-        
-        return crm_pb2.CustomerResponse(
-            customer=crm_pb2.Customer(
-                id=customer.id,
-                name=customer.name,
-                email=customer.email,
-                created_at=customer.created_at.isoformat()
-            )
+
+        found = self.fetch_customers(ids)
+        return crm_pb2.BatchGetCustomersResponse(
+            customers=[found[c] for c in ids if c in found],
+            missing_ids=[c for c in ids if c not in found]
         )
 
 
+    def SearchCustomers(self, request, context):
+        query = normalize(request.query)
+        if len(query) < MIN_QUERY_LENGTH:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"query must be at least {MIN_QUERY_LENGTH} characters")
+            return
+        limit = min(request.limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+
+        if self.search_index is not None and self.search_index.ready:
+            ids = self.search_index.search(query, limit)
+        else:
+            with self.get_db() as db:
+                if self.search_index is None:
+                    ids = list(db.execute(queries.PG_SEARCH, queries.search_pg_params(query, limit)).scalars())
+                else:
+                    ids = rank(query, [tuple(row) for row in db.execute(queries.search_like(query))])[:limit]
+
+        found = self.fetch_customers(ids)
+        return crm_pb2.SearchCustomersResponse(customers=[found[c] for c in ids if c in found])
+
+
     def ListCustomers(self, request, context):
-        db = self.get_db()
-        customers = db.query(Customer).all()
-        cust_list = [
-            crm_pb2.Customer(
-                id=c.id,
-                name=c.name,
-                email=c.email,
-                created_at=c.created_at.isoformat()
-            ) for c in customers
-        ]
-        return crm_pb2.CustomersListResponse(customers=cust_list)
+        try:
+            limit = page_size(request.page_size)
+            after = decode_page_token(request.page_token) if request.page_token else None
+            fields = queries.customer_fields(request.fields)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            return
 
+        with self.get_db() as db:
+            customers = db.execute(queries.list_customers(after, limit, fields)).all()
+            return queries.customers_page(customers, limit, fields)
 
-    def UpdateCustomer(self, request, context):
-        db = self.get_db()
-        customer = db.query(Customer).filter(Customer.id == request.id).first()
 
-        if not customer:
-            context.abort(404, "Customer not found")
+    def StreamCustomers(self, request, context):
+        # gRPC не берёт следующее сообщение, пока клиент не готов его принять
+        with self.get_db() as db:
+            for row in db.execute(queries.stream_customers(request.batch_size)):
+                yield queries.customer_row_message(row)
+
+
+    def ImportCustomers(self, request_iterator, context):
+        # Каждая пачка от шлюза вставляется своей транзакцией, поэтому в памяти
+        # одновременно не больше одной пачки независимо от размера файла
+        result = ImportResult()
+        with self.get_db() as db:
+            db_errors = (SQLAlchemyError, *copy_errors(db.get_bind().dialect))
+            for chunk in request_iterator:
+                row_numbers, rows = prepare_rows(chunk, result)
+                if not rows:
+                    continue
+                try:
+                    insert_customers(db, rows)
+                    db.commit()
+                except db_errors as e:
+                    db.rollback()
+                    result.fail_rows(row_numbers, e)
+                    continue
+                result.imported += len(rows)
+                for row in rows:
+                    self.index_customer(row["id"], row["name"], row["email"])
+
+        return result.response()
+
+
+    def UpdateCustomer(self, request, context):
+        values = queries.customer_changes(request)
+        if not values:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "name or email is required")
             return
-        
-        customer.name = request.name
-        customer.email = request.email
-        db.commit()
-
-        return crm_pb2.CustomerResponse(
-            customer=crm_pb2.Customer(
-                id=customer.id,
-                name=customer.name,
-                email=customer.email,
-                created_at=customer.created_at.isoformat()
-            )
-        )
+
+        with self.get_db() as db:
+            generation = self.cache.invalidate(request.id)
+            row = db.execute(queries.update_customer(request.id, values)).first()
+
+            if row is None:
+                context.abort(grpc.StatusCode.NOT_FOUND, "Customer not found")
+                return
+
+            db.commit()
+        message = queries.customer_row_message(row)
+        self.cache.write(request.id, message.SerializeToString(), generation)
+        self.index_customer(message.id, message.name, message.email)
+        return crm_pb2.CustomerResponse(customer=message)
 
 
     def DeleteCustomer(self, request, context):
-        db = self.get_db()
-        customer = db.query(Customer).filter(Customer.id == request.id).first()
+        with self.get_db() as db:
+            self.cache.invalidate(request.id)
+            deleted = db.execute(queries.delete_customer(request.id)).rowcount
 
-        if not customer:
-            context.abort(404, "Customer not found")
-            return
-        
-        db.delete(customer)
-        db.commit()
+            if not deleted:
+                context.abort(grpc.StatusCode.NOT_FOUND, "Customer not found")
+                return
+
+            db.commit()
+        # Повторно: чтение между первой инвалидацией и коммитом могло вернуть клиента в кэш
+        self.cache.invalidate(request.id)
+        if self.search_index is not None:
+            self.search_index.remove(request.id)
         return crm_pb2.Empty()
-    
+
+
+    def GetMetrics(self, request, context):
+        values = {"grpc.max_workers": MAX_WORKERS}
+        values.update(pool_metrics(engine))
+        values.update(self.cache.stats())
+        values.update(log_metrics())
+        return crm_pb2.MetricsResponse(values=values)
+
+
+SERVER_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_recv_ping_interval_without_data_ms", 10000),
+    ("grpc.http2.max_ping_strikes", 0),
+    *message_size_options(),
+]
+
+MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+GRPC_PORT = os.getenv("GRPC_PORT", "50051")
+# thread — пул потоков и синхронный SQLAlchemy, aio — grpc.aio и асинхронный движок
+SERVER_MODE = os.getenv("SERVER_MODE", "thread")
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    crm_pb2_grpc.add_CustomerServiceServicer_to_server(CustomerService(), server)
-    server.add_insecure_port('[::]:50051')
-    print("Customer Service запущен. Порт: 50051")
+    setup_logging("customer-service")
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+        options=SERVER_OPTIONS,
+        interceptors=[CompressionInterceptor()]
+    )
+    service = CustomerService()
+    if service.search_index is not None:
+        threading.Thread(target=service.run_search_index_refresh, daemon=True).start()
+    crm_pb2_grpc.add_CustomerServiceServicer_to_server(service, server)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    logger.info("Customer Service запущен", extra={"port": GRPC_PORT})
     server.start()
     server.wait_for_termination()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    if SERVER_MODE == "aio":
+        from aio_main import serve as serve_aio
+        asyncio.run(serve_aio())
+    else:
+        serve()
@@ -0,0 +1,110 @@
+"""Версионные миграции схемы. Запускаются один раз при деплое:
+
+    python app/migrations.py
+"""
+import logging
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, inspect, select, insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+
+from database import Customer, engine
+from log import setup_logging
+
+# Произвольный ключ advisory-блокировки: реплики, стартующие одновременно, ждут друг друга
+MIGRATION_LOCK_ID = 7321001
+
+logger = logging.getLogger("customers.migrations")
+
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def create_table(conn, table):
+    # Только CREATE TABLE: индексы модели добавляют свои миграции
+    if not inspect(conn).has_table(table.name):
+        conn.execute(CreateTable(table))
+
+
+def create_index(conn, table, name):
+    index = next(i for i in table.indexes if i.name == name)
+    index.create(conn, checkfirst=True)
+
+
+def initial_schema(conn):
+    # Таблица могла появиться раньше через create_all
+    create_table(conn, Customer.__table__)
+
+
+def customer_indexes(conn):
+    create_index(conn, Customer.__table__, "ix_customers_email")
+    create_index(conn, Customer.__table__, "ix_customers_created_at_id")
+
+
+def trigram_indexes(conn):
+    # Только PostgreSQL; без прав на pg_trgm поиск работает на индексе в памяти сервиса
+    if conn.dialect.name != "postgresql":
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError:
+        # Не записываем версию: миграция повторится, когда расширение станет доступно
+        logger.warning("pg_trgm недоступен, индексы поиска не созданы")
+        return False
+    table = Customer.__table__.name
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_customers_name_trgm ON "{table}" USING gin (lower(name) gin_trgm_ops)'))
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_customers_email_trgm ON "{table}" USING gin (lower(email) gin_trgm_ops)'))
+
+
+MIGRATIONS = [
+    (1, "initial schema", initial_schema),
+    (2, "customer indexes", customer_indexes),
+    (3, "trigram search indexes", trigram_indexes),
+]
+
+
+def applied_versions(conn):
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def migrate(bind=engine, target=None):
+    """Применяет недостающие миграции в одной транзакции, возвращает список применённых версий.
+
+    Версии сравниваются по набору записанных, а не по последней: пропущенная
+    миграция применяется позже, даже если после неё уже прошли следующие.
+    """
+    applied = []
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        metadata.create_all(conn)
+        done = applied_versions(conn)
+        for number, name, upgrade in MIGRATIONS:
+            if number in done or (target is not None and number > target):
+                continue
+            # False — миграция пропущена и будет повторена при следующем запуске
+            if upgrade(conn) is False:
+                continue
+            conn.execute(insert(schema_migrations).values(
+                version=number, name=name, applied_at=datetime.now(timezone.utc).replace(tzinfo=None)
+            ))
+            applied.append(number)
+    return applied
+
+
+if __name__ == "__main__":
+    setup_logging("customer-service")
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    applied = migrate(target=target)
+    if applied:
+        logger.info("Применены миграции", extra={"versions": applied})
+    else:
+        logger.info("Схема актуальна")
@@ -0,0 +1,163 @@
+"""Запросы customer-service, общие для синхронного и асинхронного (grpc.aio) серверов"""
+import uuid
+
+from sqlalchemy import delete, or_, select, text, tuple_, update
+
+import crm_pb2
+from database import Customer
+from fields import mask_fields, masked_message, projection
+from pagination import encode_page_token
+from search import MAX_CANDIDATES
+
+STREAM_BATCH_SIZE = 1000
+MAX_STREAM_BATCH_SIZE = 10000
+MAX_BATCH_GET_IDS = 10000
+# Держим число параметров IN (...) ниже лимитов драйверов
+BATCH_GET_CHUNK_SIZE = 500
+
+customer_table = Customer.__table__
+# Списки читаются через Core: строки-кортежи без identity map и отслеживания изменений
+CUSTOMER_COLUMNS = (customer_table.c.id, customer_table.c.name, customer_table.c.email, customer_table.c.created_at)
+
+
+def customer_message(c):
+    return crm_pb2.Customer(
+        id=c.id,
+        name=c.name,
+        email=c.email,
+        created_at=c.created_at.isoformat()
+    )
+
+
+def customer_row_message(row):
+    """Customer из строки CUSTOMER_COLUMNS"""
+    customer_id, name, email, created_at = row
+    return crm_pb2.Customer(id=customer_id, name=name, email=email, created_at=created_at.isoformat())
+
+
+def customer_fields(mask):
+    """Поля Customer из FieldMask запроса; ValueError — неизвестное поле"""
+    return mask_fields(mask, CUSTOMER_COLUMNS)
+
+
+def mask_customer(message, fields):
+    return message if fields is None else masked_message(crm_pb2.Customer, fields, message)
+
+
+def new_customer(name, email):
+    return Customer(id=f"cust_{uuid.uuid4()}", name=name, email=email)
+
+
+def get_customer(customer_id):
+    return select(Customer).where(Customer.id == customer_id)
+
+
+def customer_changes(request):
+    """Непустые поля UpdateCustomerRequest: меняются только они"""
+    return {name: value for name, value in (("name", request.name), ("email", request.email)) if value}
+
+
+def update_customer(customer_id, values):
+    # Одна команда вместо SELECT + UPDATE: строка блокируется самим UPDATE,
+    # новые значения приходят в RETURNING, отсутствие клиента — пустой результат
+    return (
+        update(customer_table)
+        .where(customer_table.c.id == customer_id)
+        .values(**values)
+        .returning(*CUSTOMER_COLUMNS)
+    )
+
+
+def delete_customer(customer_id):
+    """Отсутствие клиента видно по rowcount == 0"""
+    return delete(customer_table).where(customer_table.c.id == customer_id)
+
+
+def customers_by_ids(ids):
+    """Запросы IN (...) по BATCH_GET_CHUNK_SIZE ID"""
+    for start in range(0, len(ids), BATCH_GET_CHUNK_SIZE):
+        yield select(*CUSTOMER_COLUMNS).where(customer_table.c.id.in_(ids[start:start + BATCH_GET_CHUNK_SIZE]))
+
+
+def list_customers(after, limit, fields=None):
+    # created_at и id нужны для курсора следующей страницы, даже если их нет в маске
+    columns = projection(CUSTOMER_COLUMNS, fields, required=("created_at", "id"))
+    query = select(*columns).order_by(customer_table.c.created_at, customer_table.c.id)
+    if after:
+        query = query.where(tuple_(customer_table.c.created_at, customer_table.c.id) > tuple_(*after))
+    # Лишняя строка показывает, есть ли следующая страница
+    return query.limit(limit + 1)
+
+
+def customers_page(customers, limit, fields=None):
+    next_page_token = ""
+    if len(customers) > limit:
+        customers = customers[:limit]
+        next_page_token = encode_page_token(customers[-1].created_at, customers[-1].id)
+    if fields is None:
+        messages = [customer_row_message(row) for row in customers]
+    else:
+        messages = [masked_message(crm_pb2.Customer, fields, row) for row in customers]
+    return crm_pb2.CustomersListResponse(
+        customers=messages,
+        next_page_token=next_page_token
+    )
+
+
+def stream_customers(batch_size):
+    # yield_per читает строки пачками через серверный курсор, поэтому
+    # память не зависит от размера таблицы
+    batch_size = min(batch_size or STREAM_BATCH_SIZE, MAX_STREAM_BATCH_SIZE)
+    return (
+        select(*CUSTOMER_COLUMNS)
+        .order_by(customer_table.c.created_at, customer_table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+def customer_texts(batch_size=10000):
+    """id, name, email всех клиентов для индекса поиска"""
+    return select(Customer.id, Customer.name, Customer.email).execution_options(yield_per=batch_size)
+
+
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_like(query):
+    """Без индекса: пока индекс в памяти строится после старта; ранжирование — search.rank"""
+    pattern = f"%{escape_like(query)}%"
+    return (
+        select(Customer.id, Customer.name, Customer.email)
+        .where(or_(Customer.name.ilike(pattern, escape="\\"), Customer.email.ilike(pattern, escape="\\")))
+        .limit(MAX_CANDIDATES)
+    )
+
+
+# Поиск через PostgreSQL только при обоих GIN-индексах миграции 3: одного
+# расширения мало, без индексов PG_SEARCH читал бы всю таблицу
+PG_TRGM_INDEXED = text("""
+    SELECT 1 FROM pg_indexes
+    WHERE tablename = 'Customers' AND indexname IN ('ix_customers_name_trgm', 'ix_customers_email_trgm')
+    HAVING count(*) = 2
+""")
+
+# Как и search_like, ранжирует не больше MAX_CANDIDATES совпадений: частая
+# подстрока (домен почты) иначе заставила бы считать similarity() по всем
+PG_SEARCH = text("""
+    SELECT id FROM (
+        SELECT id, name, email FROM "Customers"
+        WHERE lower(name) LIKE :pattern ESCAPE '\\' OR lower(email) LIKE :pattern ESCAPE '\\'
+        LIMIT :max_candidates
+    ) AS candidates
+    ORDER BY greatest(
+        CASE WHEN lower(name) LIKE :pattern ESCAPE '\\' THEN similarity(lower(name), :query) ELSE 0 END,
+        CASE WHEN lower(email) LIKE :pattern ESCAPE '\\' THEN similarity(lower(email), :query) ELSE 0 END
+    ) DESC, name, id
+    LIMIT :limit
+""")
+
+
+def search_pg_params(query, limit):
+    """Параметры PG_SEARCH: поиск через GIN-индексы pg_trgm (миграция 3)"""
+    return {"pattern": f"%{escape_like(query)}%", "query": query, "limit": limit, "max_candidates": MAX_CANDIDATES}
@@ -0,0 +1,167 @@
+import re
+import threading
+from array import array
+from functools import lru_cache
+
+MIN_QUERY_LENGTH = 3
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# Сколько совпадений ранжировать: на частых подстроках (домен почты) не сортируем весь миллион
+MAX_CANDIDATES = 1000
+
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize(value):
+    return value.strip().lower()
+
+
+@lru_cache(maxsize=65536)
+def padded_trigrams(word):
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def word_trigrams(value):
+    """Триграммы как в pg_trgm: каждое слово дополняется двумя пробелами слева и одним справа"""
+    # Имена повторяются, поэтому триграммы слов кэшируются
+    return set().union(*map(padded_trigrams, WORD_RE.findall(value.lower())))
+
+
+def similarity(left, right):
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def substring_trigrams(value):
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def rank(query, rows):
+    """rows: (id, name, email); сортировка по схожести с запросом, как similarity() в pg_trgm"""
+    grams = word_trigrams(query)
+
+    def score(name, email):
+        # Ранжируем по полям, в которых найден запрос: триграммы остальных не считаем
+        best = 0.0
+        for value in (name, email):
+            if query in value.lower():
+                best = max(best, similarity(grams, word_trigrams(value)))
+        return best
+
+    scored = [(score(name, email), name, row_id) for row_id, name, email in rows]
+    scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+    return [row_id for _, _, row_id in scored]
+
+
+class TrigramIndex:
+    """Инвертированный индекс подстрок name/email в памяти процесса.
+
+    Списки документов хранятся в array('I'), удалённые документы помечаются
+    и отфильтровываются при поиске; индекс целиком пересобирается rebuild().
+    Пока новый индекс строится, add/remove запоминаются в _pending и
+    повторяются на нём в swap(): иначе снимок, прочитанный до записи, потерял бы её.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self._pending = None
+        self.ready = False
+
+    def _reset(self):
+        self._postings = {}
+        self._ids = []
+        self._texts = []
+        self._docs = {}
+        self._deleted = set()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add(self, customer_id, name, email):
+        self._remove(customer_id)
+        doc = len(self._ids)
+        name, email = name.lower(), email.lower()
+        self._ids.append(customer_id)
+        self._texts.append((name, email))
+        self._docs[customer_id] = doc
+        for gram in substring_trigrams(name) | substring_trigrams(email):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(doc)
+
+    def _remove(self, customer_id):
+        doc = self._docs.pop(customer_id, None)
+        if doc is not None:
+            self._deleted.add(doc)
+
+    def add(self, customer_id, name, email):
+        with self._lock:
+            self._add(customer_id, name, email)
+            if self._pending is not None:
+                self._pending.append((customer_id, name, email))
+
+    def remove(self, customer_id):
+        with self._lock:
+            self._remove(customer_id)
+            if self._pending is not None:
+                self._pending.append((customer_id, None, None))
+
+    def add_many(self, rows):
+        with self._lock:
+            for customer_id, name, email in rows:
+                self._add(customer_id, name, email)
+
+    def start_rebuild(self):
+        """Вызывается до чтения снимка: с этого момента записи запоминаются для swap()"""
+        with self._lock:
+            self._pending = []
+
+    def abort_rebuild(self):
+        with self._lock:
+            self._pending = None
+
+    def swap(self, fresh):
+        """Подменяет содержимое индексом, построенным в стороне: поиск не ждёт пересборки"""
+        with self._lock:
+            for customer_id, name, email in self._pending or ():
+                if name is None:
+                    fresh._remove(customer_id)
+                else:
+                    fresh._add(customer_id, name, email)
+            self._pending = None
+            self._postings, self._ids, self._texts = fresh._postings, fresh._ids, fresh._texts
+            self._docs, self._deleted = fresh._docs, fresh._deleted
+            self.ready = True
+
+    def rebuild(self, rows):
+        """rows: итерируемое (id, name, email)"""
+        self.start_rebuild()
+        try:
+            fresh = TrigramIndex()
+            fresh.add_many(rows)
+        except BaseException:
+            self.abort_rebuild()
+            raise
+        self.swap(fresh)
+
+    def search(self, query, limit):
+        query = normalize(query)
+        with self._lock:
+            postings = [self._postings.get(gram) for gram in substring_trigrams(query)]
+            if not postings or None in postings:
+                return []
+            # Проверяем подстроку только у документов из самого короткого списка
+            rows = []
+            for doc in min(postings, key=len):
+                if doc in self._deleted:
+                    continue
+                name, email = self._texts[doc]
+                if query in name or query in email:
+                    rows.append((self._ids[doc], name, email))
+                    if len(rows) >= MAX_CANDIDATES:
+                        break
+        return rank(query, rows)[:limit]
@@ -1,12 +1,16 @@
 import sys
 import os
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
 
 from app.main import CustomerService
+from database import SessionLocal, Customer
+from migrations import migrate, MIGRATIONS
 import crm_pb2
+import grpc
 
 
 @pytest.fixture
@@ -18,7 +22,16 @@ def service():
 @pytest.fixture(autouse=True)
 def reset_database(service):
     """Очищение базы перед каждым тестом"""
-    service.customers_db.clear()
+    migrate()
+    with SessionLocal() as db:
+        db.query(Customer).delete()
+        db.commit()
+
+
+def count_customers():
+    with SessionLocal() as db:
+        return db.query(Customer).count()
+
 
 def test_create_customer(service):
     """Тест: создание клиента"""
@@ -30,7 +43,7 @@ def test_create_customer(service):
     assert response.customer.name == "Иван Иванов"
     assert response.customer.email == "email@email.ru"
     assert response.customer.id is not None
-    assert len(service.customers_db) == 1
+    assert count_customers() == 1
 
 
 def test_get_customer_existing(service):
@@ -54,12 +67,12 @@ def test_get_customer_not_found(service):
 
     response = service.GetCustomer(get_req, context)
 
-    context.abort.assert_called_once_with(404, "Customer not found")
+    context.abort.assert_called_once_with(grpc.StatusCode.NOT_FOUND, "Customer not found")
 
 
 def test_list_customers_empty(service):
     """Тест: список клиентов — пусто"""
-    request = crm_pb2.Empty()
+    request = crm_pb2.ListCustomersRequest()
     context = MagicMock()
     response = service.ListCustomers(request, context)
 
@@ -77,7 +90,7 @@ def test_list_customers_with_data(service):
         MagicMock()
     )
 
-    request = crm_pb2.Empty()
+    request = crm_pb2.ListCustomersRequest()
     context = MagicMock()
     response = service.ListCustomers(request, context)
 
@@ -96,4 +109,472 @@ def test_create_multiple_customers_ids_unique(service):
         resp = service.CreateCustomer(req, MagicMock())
         ids.append(resp.customer.id)
 
-    assert len(ids) == len(set(ids)), "ID должны быть уникальными"
\ No newline at end of file
+    assert len(ids) == len(set(ids)), "ID должны быть уникальными"
+
+
+def test_list_customers_pagination(service):
+    """Тест: постраничный список клиентов по курсору"""
+    for i in range(5):
+        service.CreateCustomer(
+            crm_pb2.CreateCustomerRequest(name=f"Клиент {i}", email=f"client{i}@email.ru"),
+            MagicMock()
+        )
+
+    names = []
+    page_token = ""
+    pages = 0
+    while True:
+        response = service.ListCustomers(
+            crm_pb2.ListCustomersRequest(page_size=2, page_token=page_token),
+            MagicMock()
+        )
+        names.extend(c.name for c in response.customers)
+        pages += 1
+        page_token = response.next_page_token
+        if not page_token:
+            break
+
+    assert pages == 3
+    assert names == [f"Клиент {i}" for i in range(5)]
+
+
+def test_list_customers_invalid_page_token(service):
+    """Тест: некорректный курсор страницы"""
+    context = MagicMock()
+
+    service.ListCustomers(crm_pb2.ListCustomersRequest(page_token="не-курсор"), context)
+
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "Invalid page_token")
+
+
+def test_stream_customers(service):
+    """Тест: потоковая выгрузка всех клиентов"""
+    for i in range(3):
+        service.CreateCustomer(
+            crm_pb2.CreateCustomerRequest(name=f"Клиент {i}", email=f"client{i}@email.ru"),
+            MagicMock()
+        )
+
+    customers = list(service.StreamCustomers(crm_pb2.StreamCustomersRequest(batch_size=2), MagicMock()))
+
+    assert [c.name for c in customers] == ["Клиент 0", "Клиент 1", "Клиент 2"]
+
+
+def test_import_customers(service):
+    """Тест: импорт клиентов пачками с ошибками по строкам"""
+    chunks = [
+        crm_pb2.ImportCustomersChunk(rows=[
+            crm_pb2.CustomerRow(row=2, name="Иван", email="ivan@email.ru"),
+            crm_pb2.CustomerRow(row=3, name="", email="empty@email.ru"),
+        ]),
+        crm_pb2.ImportCustomersChunk(rows=[
+            crm_pb2.CustomerRow(row=4, name="Пётр", email="не-почта"),
+            crm_pb2.CustomerRow(row=5, name="Анна", email="anna@email.ru"),
+        ]),
+    ]
+
+    response = service.ImportCustomers(iter(chunks), MagicMock())
+
+    assert response.imported == 2
+    assert response.failed == 2
+    assert [(e.row, e.message) for e in response.errors] == [(3, "name is required"), (4, "email is invalid")]
+    assert count_customers() == 2
+
+
+def test_get_customer_cached(service):
+    """Тест: повторный GetCustomer обслуживается из кэша, изменения идут через кэш"""
+    created = service.CreateCustomer(crm_pb2.CreateCustomerRequest(name="Петя", email="petya@email.ru"), MagicMock())
+    get_req = crm_pb2.GetCustomerRequest(id=created.customer.id)
+
+    service.GetCustomer(get_req, MagicMock())
+    response = service.GetCustomer(get_req, MagicMock())
+    assert response.customer == created.customer
+    assert service.cache.hits == 1
+
+    service.UpdateCustomer(
+        crm_pb2.UpdateCustomerRequest(id=created.customer.id, name="Пётр", email="petr@email.ru"),
+        MagicMock()
+    )
+    assert service.GetCustomer(get_req, MagicMock()).customer.name == "Пётр"
+    assert service.cache.hits == 2
+
+    service.DeleteCustomer(crm_pb2.DeleteCustomerRequest(id=created.customer.id), MagicMock())
+    context = MagicMock()
+    service.GetCustomer(get_req, context)
+    context.abort.assert_called_once_with(grpc.StatusCode.NOT_FOUND, "Customer not found")
+
+
+def test_update_delete_customer(service):
+    """Тест: частичное обновление и удаление одной командой, отсутствующий клиент — NOT_FOUND"""
+    created = service.CreateCustomer(crm_pb2.CreateCustomerRequest(name="Петя", email="petya@email.ru"), MagicMock())
+
+    response = service.UpdateCustomer(crm_pb2.UpdateCustomerRequest(id=created.customer.id, name="Пётр"), MagicMock())
+    assert response.customer.name == "Пётр"
+    assert response.customer.email == "petya@email.ru"
+    assert response.customer.created_at == created.customer.created_at
+
+    context = MagicMock()
+    service.UpdateCustomer(crm_pb2.UpdateCustomerRequest(id=created.customer.id), context)
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "name or email is required")
+
+    for call in (
+        lambda context: service.UpdateCustomer(crm_pb2.UpdateCustomerRequest(id="cust_missing", name="Нет"), context),
+        lambda context: service.DeleteCustomer(crm_pb2.DeleteCustomerRequest(id="cust_missing"), context),
+    ):
+        context = MagicMock()
+        call(context)
+        context.abort.assert_called_once_with(grpc.StatusCode.NOT_FOUND, "Customer not found")
+
+    service.DeleteCustomer(crm_pb2.DeleteCustomerRequest(id=created.customer.id), MagicMock())
+    assert count_customers() == 0
+
+def test_batch_get_customers(service, monkeypatch):
+    """Тест: пакетное получение клиентов по частям с отсутствующими ID"""
+    import queries
+    monkeypatch.setattr(queries, "BATCH_GET_CHUNK_SIZE", 2)
+    ids = [
+        service.CreateCustomer(crm_pb2.CreateCustomerRequest(name=f"Клиент {i}", email=f"client{i}@email.ru"), MagicMock()).customer.id
+        for i in range(3)
+    ]
+    service.GetCustomer(crm_pb2.GetCustomerRequest(id=ids[0]), MagicMock())
+
+    request = crm_pb2.BatchGetCustomersRequest(ids=[ids[2], "cust_missing", ids[0], ids[1], ids[2]])
+    response = service.BatchGetCustomers(request, MagicMock())
+
+    assert [c.id for c in response.customers] == [ids[2], ids[0], ids[1]]
+    assert list(response.missing_ids) == ["cust_missing"]
+    assert service.cache.hits == 1
+
+def test_search_customers(service):
+    """Тест: поиск по подстроке имени и почты, до и после построения индекса"""
+    for name, email in [("Иван Петров", "ivan@email.ru"), ("Пётр Иванов", "petr@email.ru"), ("Анна", "anna@work.ru")]:
+        service.CreateCustomer(crm_pb2.CreateCustomerRequest(name=name, email=email), MagicMock())
+
+    service.refresh_search_index()
+    response = service.SearchCustomers(crm_pb2.SearchCustomersRequest(query="ива"), MagicMock())
+    assert [c.name for c in response.customers] == ["Иван Петров", "Пётр Иванов"]
+
+    response = service.SearchCustomers(crm_pb2.SearchCustomersRequest(query="work", limit=5), MagicMock())
+    assert [c.name for c in response.customers] == ["Анна"]
+
+    created = service.CreateCustomer(crm_pb2.CreateCustomerRequest(name="Мария", email="maria@work.ru"), MagicMock())
+    response = service.SearchCustomers(crm_pb2.SearchCustomersRequest(query="WORK.RU", limit=1), MagicMock())
+    assert len(response.customers) == 1
+
+    service.DeleteCustomer(crm_pb2.DeleteCustomerRequest(id=created.customer.id), MagicMock())
+    response = service.SearchCustomers(crm_pb2.SearchCustomersRequest(query="мари"), MagicMock())
+    assert list(response.customers) == []
+
+
+def test_pg_search_candidates(tmp_path, monkeypatch):
+    """Тест: PG_SEARCH ранжирует только MAX_CANDIDATES совпадений (similarity из pg_trgm подменена на SQLite)"""
+    import queries
+    from database import create_db_engine
+    from search import similarity, word_trigrams
+    from sqlalchemy import event, insert
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pg_search.db'}")
+
+    @event.listens_for(engine, "connect")
+    def register_functions(connection, _):
+        connection.create_function("lower", 1, str.lower)
+        connection.create_function("similarity", 2, lambda a, b: similarity(word_trigrams(a), word_trigrams(b)))
+        connection.create_function("greatest", 2, max)
+
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [
+            {"id": f"cust_{i}", "name": name, "email": f"c{i}@mail.ru"}
+            for i, name in enumerate(["Иван Петров", "Иван", "Пётр Иванов", "Анна"])
+        ])
+
+    def search(query, limit):
+        with engine.connect() as conn:
+            return list(conn.execute(queries.PG_SEARCH, queries.search_pg_params(query, limit)).scalars())
+
+    assert search("иван", 10) == ["cust_1", "cust_0", "cust_2"]
+    monkeypatch.setattr(queries, "MAX_CANDIDATES", 2)
+    assert len(search("mail.ru", 10)) == 2
+    found = search("иван", 10)
+    assert len(found) == 2 and set(found) <= {"cust_0", "cust_1", "cust_2"}
+    engine.dispose()
+
+
+def test_search_index_writes_during_rebuild(service, monkeypatch):
+    """Тест: клиенты, созданные и удалённые во время пересборки индекса, не теряются"""
+    from search import TrigramIndex
+
+    index = TrigramIndex()
+    index.add("cust_old", "Старый", "old@email.ru")
+
+    def snapshot():
+        yield "cust_old", "Старый", "old@email.ru"
+        index.add("cust_new", "Новая Анна", "anna@email.ru")
+        index.remove("cust_old")
+
+    index.rebuild(snapshot())
+    assert index.search("анна", 10) == ["cust_new"]
+    assert index.search("старый", 10) == []
+
+    add_many = TrigramIndex.add_many
+    created = []
+
+    def add_many_with_write(fresh, rows):
+        rows = list(rows)
+        created.append(service.CreateCustomer(
+            crm_pb2.CreateCustomerRequest(name="Мария", email="maria@email.ru"), MagicMock()
+        ).customer.id)
+        add_many(fresh, rows)
+
+    monkeypatch.setattr(TrigramIndex, "add_many", add_many_with_write)
+    service.refresh_search_index()
+    response = service.SearchCustomers(crm_pb2.SearchCustomersRequest(query="мари"), MagicMock())
+    assert [c.id for c in response.customers] == created
+
+
+def test_search_customers_short_query(service):
+    """Тест: слишком короткий запрос"""
+    context = MagicMock()
+    service.SearchCustomers(crm_pb2.SearchCustomersRequest(query=" a "), context)
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "query must be at least 3 characters")
+
+def test_customer_cache_limits_and_stale_fill():
+    """Тест: кэш ограничен по байтам и не принимает значения, прочитанные до инвалидации"""
+    from cache import CustomerCache
+
+    cache = CustomerCache(max_entries=10, max_bytes=10)
+    cache.set("a", b"12345", cache.generation)
+    cache.set("b", b"12345", cache.generation)
+    cache.set("c", b"12345", cache.generation)
+    assert cache.get("a") is None
+    assert cache.bytes == 10
+
+    generation = cache.generation
+    cache.invalidate("b")
+    cache.set("b", b"stale", generation)
+    assert cache.get("b") is None
+
+def test_customer_cache_ttl():
+    """Тест: запись кэша истекает через ttl"""
+    from cache import CustomerCache
+
+    now = [0.0]
+    cache = CustomerCache(max_entries=10, max_bytes=100, ttl=30, clock=lambda: now[0])
+    cache.set("a", b"12345", cache.generation)
+    now[0] = 29
+    assert cache.get("a") == b"12345"
+    now[0] = 30
+    assert cache.get("a") is None
+    assert cache.bytes == 0
+    assert cache.expirations == 1
+
+def test_customer_cache_replicas(service):
+    """Тест: удаление на другой реплике видно после истечения ttl"""
+    now = [0.0]
+    replica_a, replica_b = CustomerService(), CustomerService()
+    replica_b.cache._clock = lambda: now[0]
+    created = replica_a.CreateCustomer(crm_pb2.CreateCustomerRequest(name="Ann", email="ann@email.ru"), MagicMock())
+    get_req = crm_pb2.GetCustomerRequest(id=created.customer.id)
+
+    replica_b.GetCustomer(get_req, MagicMock())
+    replica_a.DeleteCustomer(crm_pb2.DeleteCustomerRequest(id=created.customer.id), MagicMock())
+    assert replica_b.GetCustomer(get_req, MagicMock()).customer.name == "Ann"
+
+    now[0] += replica_b.cache.ttl
+    context = MagicMock()
+    replica_b.GetCustomer(get_req, context)
+    context.abort.assert_called_once_with(grpc.StatusCode.NOT_FOUND, "Customer not found")
+
+def test_field_mask(service):
+    """Тест: FieldMask сужает ответ, курсор работает и без id/created_at в маске"""
+    from google.protobuf.field_mask_pb2 import FieldMask
+
+    for i in range(3):
+        service.CreateCustomer(crm_pb2.CreateCustomerRequest(name=f"Клиент {i}", email=f"c{i}@email.ru"), MagicMock())
+
+    first = service.ListCustomers(crm_pb2.ListCustomersRequest(page_size=2, fields=FieldMask(paths=["name"])), MagicMock())
+    assert [c.name for c in first.customers] == ["Клиент 0", "Клиент 1"]
+    assert all(c.id == "" and c.email == "" for c in first.customers)
+    second = service.ListCustomers(
+        crm_pb2.ListCustomersRequest(page_size=2, page_token=first.next_page_token, fields=FieldMask(paths=["name"])),
+        MagicMock()
+    )
+    assert [c.name for c in second.customers] == ["Клиент 2"]
+
+    customer_id = service.ListCustomers(crm_pb2.ListCustomersRequest(), MagicMock()).customers[0].id
+    for _ in range(2):  # промах и попадание в кэш
+        response = service.GetCustomer(
+            crm_pb2.GetCustomerRequest(id=customer_id, fields=FieldMask(paths=["id", "email"])), MagicMock()
+        )
+        assert response.customer == crm_pb2.Customer(id=customer_id, email="c0@email.ru")
+
+    context = MagicMock()
+    service.GetCustomer(crm_pb2.GetCustomerRequest(id=customer_id, fields=FieldMask(paths=["phone"])), context)
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "Unknown fields: phone")
+
+def test_compression_threshold(service):
+    """Тест: сжимаются только ответы и сообщения потока больше порога"""
+    from compression import CompressionInterceptor
+
+    rows = [crm_pb2.CustomerRow(row=i, name=f"Клиент {i}", email=f"client{i}@email.ru") for i in range(50)]
+    service.ImportCustomers(iter([crm_pb2.ImportCustomersChunk(rows=rows)]), MagicMock())
+    interceptor = CompressionInterceptor(grpc.Compression.Gzip, threshold=1000)
+
+    handler = grpc.unary_unary_rpc_method_handler(service.ListCustomers)
+    list_customers = interceptor.intercept_service(lambda details: handler, None).unary_unary
+    context = MagicMock()
+    list_customers(crm_pb2.ListCustomersRequest(page_size=1), context)
+    context.set_compression.assert_not_called()
+    list_customers(crm_pb2.ListCustomersRequest(page_size=50), context)
+    context.set_compression.assert_called_once_with(grpc.Compression.Gzip)
+
+    handler = grpc.unary_stream_rpc_method_handler(service.StreamCustomers)
+    stream_customers = interceptor.intercept_service(lambda details: handler, None).unary_stream
+    context = MagicMock()
+    assert len(list(stream_customers(crm_pb2.StreamCustomersRequest(), context))) == 50
+    assert context.disable_next_message_compression.call_count == 50
+
+    interceptor = CompressionInterceptor(grpc.Compression.Gzip, threshold=1000, skip=["/crm.CustomerService/ListCustomers"])
+    details = MagicMock(method="/crm.CustomerService/ListCustomers")
+    assert interceptor.intercept_service(lambda details: handler, details) is handler
+
+def test_get_metrics(service):
+    """Тест: метрики сервиса"""
+    response = service.GetMetrics(crm_pb2.Empty(), MagicMock())
+
+    assert response.values["grpc.max_workers"] > 0
+
+
+def test_session_scope_returns_connections(tmp_path):
+    """Тест: сессия на запрос возвращает соединение в пул даже после ошибки"""
+    from database import InstrumentedQueuePool, create_db_engine, pool_metrics, session_scope
+    from sqlalchemy.orm import sessionmaker
+    import database
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    migrate(engine)
+    original = database.SessionLocal
+    database.SessionLocal = sessionmaker(bind=engine)
+    try:
+        with session_scope() as db:
+            db.add(Customer(id="cust_1", name="Иван", email="ivan@email.ru"))
+            db.commit()
+        with pytest.raises(RuntimeError):
+            with session_scope() as db:
+                db.add(Customer(id="cust_2", name="Пётр", email="petr@email.ru"))
+                db.flush()
+                raise RuntimeError
+        with session_scope() as db:
+            assert db.query(Customer).count() == 1
+    finally:
+        database.SessionLocal = original
+
+    metrics = pool_metrics(engine)
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert metrics["db_pool.checked_out"] == 0
+    assert metrics["db_pool.checkouts"] >= 3
+    engine.dispose()
+
+
+def test_migrations(tmp_path):
+    """Тест: миграции создают индексы и повторно не применяются"""
+    from database import create_db_engine
+    from sqlalchemy import inspect
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+    assert migrate(engine, target=1) == [1]
+    assert inspect(engine).get_indexes("Customers") == []
+    assert migrate(engine) == [number for number, _, _ in MIGRATIONS[1:]]
+    assert migrate(engine) == []
+    assert {i["name"] for i in inspect(engine).get_indexes("Customers")} == {"ix_customers_email", "ix_customers_created_at_id"}
+    engine.dispose()
+
+
+def test_migrations_retry_skipped(tmp_path, monkeypatch):
+    """Тест: пропущенная миграция не записывается и применяется позже, даже после следующих"""
+    import migrations
+    from database import create_db_engine
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'skipped.db'}")
+    available = [False]
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:2] + [
+        (3, "needs extension", lambda conn: None if available[0] else False),
+        (4, "later", lambda conn: None),
+    ])
+
+    assert migrate(engine) == [1, 2, 4]
+    assert migrate(engine) == []
+    available[0] = True
+    assert migrate(engine) == [3]
+    assert migrate(engine) == []
+    engine.dispose()
+
+
+class Aborted(Exception):
+    pass
+
+
+def aio_context():
+    context = MagicMock()
+    context.abort = AsyncMock(side_effect=Aborted)
+    return context
+
+
+def test_async_service(tmp_path):
+    """Тест: асинхронный сервер (SERVER_MODE=aio) ведёт себя так же, как синхронный"""
+    import asyncio
+    from database import create_db_engine, create_async_db_engine
+    from aio_main import AsyncCustomerService
+
+    url = f"sqlite:///{tmp_path / 'aio.db'}"
+    sync_engine = create_db_engine(url)
+    migrate(sync_engine)
+    sync_engine.dispose()
+
+    async def scenario():
+        engine = create_async_db_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+        service = AsyncCustomerService(engine)
+
+        created = await service.CreateCustomer(crm_pb2.CreateCustomerRequest(name="Иван", email="ivan@email.ru"), aio_context())
+        customer_id = created.customer.id
+        assert (await service.GetCustomer(crm_pb2.GetCustomerRequest(id=customer_id), aio_context())).customer == created.customer
+
+        async def chunks():
+            yield crm_pb2.ImportCustomersChunk(rows=[
+                crm_pb2.CustomerRow(row=2, name="Анна", email="anna@email.ru"),
+                crm_pb2.CustomerRow(row=3, name="", email="empty@email.ru"),
+            ])
+        imported = await service.ImportCustomers(chunks(), aio_context())
+        assert (imported.imported, imported.failed) == (1, 1)
+
+        page = await service.ListCustomers(crm_pb2.ListCustomersRequest(page_size=1), aio_context())
+        assert [c.name for c in page.customers] == ["Иван"] and page.next_page_token
+        streamed = [c.name async for c in service.StreamCustomers(crm_pb2.StreamCustomersRequest(), aio_context())]
+        assert streamed == ["Иван", "Анна"]
+
+        batch = await service.BatchGetCustomers(crm_pb2.BatchGetCustomersRequest(ids=[customer_id, "cust_missing"]), aio_context())
+        assert list(batch.missing_ids) == ["cust_missing"]
+
+        await service.refresh_search_index()
+        found = await service.SearchCustomers(crm_pb2.SearchCustomersRequest(query="анн"), aio_context())
+        assert [c.name for c in found.customers] == ["Анна"]
+
+        updated = await service.UpdateCustomer(
+            crm_pb2.UpdateCustomerRequest(id=customer_id, name="Пётр", email="petr@email.ru"), aio_context()
+        )
+        assert updated.customer.name == "Пётр"
+        await service.DeleteCustomer(crm_pb2.DeleteCustomerRequest(id=customer_id), aio_context())
+
+        context = aio_context()
+        with pytest.raises(Aborted):
+            await service.GetCustomer(crm_pb2.GetCustomerRequest(id=customer_id), context)
+        context.abort.assert_called_once_with(grpc.StatusCode.NOT_FOUND, "Customer not found")
+        assert (await service.GetMetrics(crm_pb2.Empty(), aio_context())).values["db_pool.checked_out"] == 0
+
+        refresh = service.refresh_task = asyncio.create_task(service.run_search_index_refresh())
+        await asyncio.sleep(0)
+        await service.stop()
+        assert refresh.cancelled() and service.refresh_task is None
+
+    asyncio.run(scenario())
@@ -3,8 +3,14 @@ let customers = [];
 
 async function loadCustomers() {
     try {
-        const data = await api('/customers');
-        customers = data.customers;
+        customers = [];
+        let cursor = null;
+        do {
+            const query = cursor ? `?limit=1000&cursor=${encodeURIComponent(cursor)}` : '?limit=1000';
+            const data = await api(`/customers${query}`);
+            customers.push(...data.customers);
+            cursor = data.next_cursor;
+        } while (cursor);
         renderCustomers();
     } catch (err) {
         document.getElementById('customersList').innerHTML = '<li>Ошибка загрузки</li>';
@@ -44,6 +44,16 @@ class CustomerServiceStub(object):
                 request_serializer=crm__pb2.GetCustomerRequest.SerializeToString,
                 response_deserializer=crm__pb2.CustomerResponse.FromString,
                 _registered_method=True)
+        self.BatchGetCustomers = channel.unary_unary(
+                '/crm.CustomerService/BatchGetCustomers',
+                request_serializer=crm__pb2.BatchGetCustomersRequest.SerializeToString,
+                response_deserializer=crm__pb2.BatchGetCustomersResponse.FromString,
+                _registered_method=True)
+        self.SearchCustomers = channel.unary_unary(
+                '/crm.CustomerService/SearchCustomers',
+                request_serializer=crm__pb2.SearchCustomersRequest.SerializeToString,
+                response_deserializer=crm__pb2.SearchCustomersResponse.FromString,
+                _registered_method=True)
         self.UpdateCustomer = channel.unary_unary(
                 '/crm.CustomerService/UpdateCustomer',
                 request_serializer=crm__pb2.UpdateCustomerRequest.SerializeToString,
@@ -56,9 +66,24 @@ class CustomerServiceStub(object):
                 _registered_method=True)
         self.ListCustomers = channel.unary_unary(
                 '/crm.CustomerService/ListCustomers',
-                request_serializer=crm__pb2.Empty.SerializeToString,
+                request_serializer=crm__pb2.ListCustomersRequest.SerializeToString,
                 response_deserializer=crm__pb2.CustomersListResponse.FromString,
                 _registered_method=True)
+        self.StreamCustomers = channel.unary_stream(
+                '/crm.CustomerService/StreamCustomers',
+                request_serializer=crm__pb2.StreamCustomersRequest.SerializeToString,
+                response_deserializer=crm__pb2.Customer.FromString,
+                _registered_method=True)
+        self.ImportCustomers = channel.stream_unary(
+                '/crm.CustomerService/ImportCustomers',
+                request_serializer=crm__pb2.ImportCustomersChunk.SerializeToString,
+                response_deserializer=crm__pb2.ImportCustomersResponse.FromString,
+                _registered_method=True)
+        self.GetMetrics = channel.unary_unary(
+                '/crm.CustomerService/GetMetrics',
+                request_serializer=crm__pb2.Empty.SerializeToString,
+                response_deserializer=crm__pb2.MetricsResponse.FromString,
+                _registered_method=True)
 
 
 class CustomerServiceServicer(object):
@@ -76,6 +101,18 @@ class CustomerServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchGetCustomers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchCustomers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def UpdateCustomer(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -94,6 +131,24 @@ class CustomerServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamCustomers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ImportCustomers(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMetrics(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CustomerServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -107,6 +162,16 @@ def add_CustomerServiceServicer_to_server(servicer, server):
                     request_deserializer=crm__pb2.GetCustomerRequest.FromString,
                     response_serializer=crm__pb2.CustomerResponse.SerializeToString,
             ),
+            'BatchGetCustomers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetCustomers,
+                    request_deserializer=crm__pb2.BatchGetCustomersRequest.FromString,
+                    response_serializer=crm__pb2.BatchGetCustomersResponse.SerializeToString,
+            ),
+            'SearchCustomers': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchCustomers,
+                    request_deserializer=crm__pb2.SearchCustomersRequest.FromString,
+                    response_serializer=crm__pb2.SearchCustomersResponse.SerializeToString,
+            ),
             'UpdateCustomer': grpc.unary_unary_rpc_method_handler(
                     servicer.UpdateCustomer,
                     request_deserializer=crm__pb2.UpdateCustomerRequest.FromString,
@@ -119,9 +184,24 @@ def add_CustomerServiceServicer_to_server(servicer, server):
             ),
             'ListCustomers': grpc.unary_unary_rpc_method_handler(
                     servicer.ListCustomers,
-                    request_deserializer=crm__pb2.Empty.FromString,
+                    request_deserializer=crm__pb2.ListCustomersRequest.FromString,
                     response_serializer=crm__pb2.CustomersListResponse.SerializeToString,
             ),
+            'StreamCustomers': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamCustomers,
+                    request_deserializer=crm__pb2.StreamCustomersRequest.FromString,
+                    response_serializer=crm__pb2.Customer.SerializeToString,
+            ),
+            'ImportCustomers': grpc.stream_unary_rpc_method_handler(
+                    servicer.ImportCustomers,
+                    request_deserializer=crm__pb2.ImportCustomersChunk.FromString,
+                    response_serializer=crm__pb2.ImportCustomersResponse.SerializeToString,
+            ),
+            'GetMetrics': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMetrics,
+                    request_deserializer=crm__pb2.Empty.FromString,
+                    response_serializer=crm__pb2.MetricsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'crm.CustomerService', rpc_method_handlers)
@@ -187,6 +267,60 @@ class CustomerService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchGetCustomers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/crm.CustomerService/BatchGetCustomers',
+            crm__pb2.BatchGetCustomersRequest.SerializeToString,
+            crm__pb2.BatchGetCustomersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchCustomers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/crm.CustomerService/SearchCustomers',
+            crm__pb2.SearchCustomersRequest.SerializeToString,
+            crm__pb2.SearchCustomersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def UpdateCustomer(request,
             target,
@@ -256,7 +390,7 @@ class CustomerService(object):
             request,
             target,
             '/crm.CustomerService/ListCustomers',
-            crm__pb2.Empty.SerializeToString,
+            crm__pb2.ListCustomersRequest.SerializeToString,
             crm__pb2.CustomersListResponse.FromString,
             options,
             channel_credentials,
@@ -268,6 +402,87 @@ class CustomerService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def StreamCustomers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/crm.CustomerService/StreamCustomers',
+            crm__pb2.StreamCustomersRequest.SerializeToString,
+            crm__pb2.Customer.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ImportCustomers(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/crm.CustomerService/ImportCustomers',
+            crm__pb2.ImportCustomersChunk.SerializeToString,
+            crm__pb2.ImportCustomersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMetrics(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/crm.CustomerService/GetMetrics',
+            crm__pb2.Empty.SerializeToString,
+            crm__pb2.MetricsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
 
 class OrderServiceStub(object):
     """Missing associated documentation comment in .proto file."""
@@ -283,11 +498,36 @@ class OrderServiceStub(object):
                 request_serializer=crm__pb2.CreateOrdersRequest.SerializeToString,
                 response_deserializer=crm__pb2.OrderResponse.FromString,
                 _registered_method=True)
+        self.CreateOrders = channel.stream_unary(
+                '/crm.OrderService/CreateOrders',
+                request_serializer=crm__pb2.CreateOrdersRequest.SerializeToString,
+                response_deserializer=crm__pb2.CreateOrdersResponse.FromString,
+                _registered_method=True)
         self.GetCustomerOrders = channel.unary_unary(
                 '/crm.OrderService/GetCustomerOrders',
                 request_serializer=crm__pb2.GetCustomerOrdersRequest.SerializeToString,
                 response_deserializer=crm__pb2.OrderListResponse.FromString,
                 _registered_method=True)
+        self.GetCustomerStats = channel.unary_unary(
+                '/crm.OrderService/GetCustomerStats',
+                request_serializer=crm__pb2.GetCustomerStatsRequest.SerializeToString,
+                response_deserializer=crm__pb2.CustomerStats.FromString,
+                _registered_method=True)
+        self.GetRevenueReport = channel.unary_unary(
+                '/crm.OrderService/GetRevenueReport',
+                request_serializer=crm__pb2.RevenueReportRequest.SerializeToString,
+                response_deserializer=crm__pb2.RevenueReport.FromString,
+                _registered_method=True)
+        self.ExportOrders = channel.unary_stream(
+                '/crm.OrderService/ExportOrders',
+                request_serializer=crm__pb2.ExportOrdersRequest.SerializeToString,
+                response_deserializer=crm__pb2.ExportChunk.FromString,
+                _registered_method=True)
+        self.GetMetrics = channel.unary_unary(
+                '/crm.OrderService/GetMetrics',
+                request_serializer=crm__pb2.Empty.SerializeToString,
+                response_deserializer=crm__pb2.MetricsResponse.FromString,
+                _registered_method=True)
 
 
 class OrderServiceServicer(object):
@@ -299,12 +539,42 @@ class OrderServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CreateOrders(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetCustomerOrders(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetCustomerStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRevenueReport(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ExportOrders(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMetrics(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_OrderServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -313,11 +583,36 @@ def add_OrderServiceServicer_to_server(servicer, server):
                     request_deserializer=crm__pb2.CreateOrdersRequest.FromString,
                     response_serializer=crm__pb2.OrderResponse.SerializeToString,
             ),
+            'CreateOrders': grpc.stream_unary_rpc_method_handler(
+                    servicer.CreateOrders,
+                    request_deserializer=crm__pb2.CreateOrdersRequest.FromString,
+                    response_serializer=crm__pb2.CreateOrdersResponse.SerializeToString,
+            ),
             'GetCustomerOrders': grpc.unary_unary_rpc_method_handler(
                     servicer.GetCustomerOrders,
                     request_deserializer=crm__pb2.GetCustomerOrdersRequest.FromString,
                     response_serializer=crm__pb2.OrderListResponse.SerializeToString,
             ),
+            'GetCustomerStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetCustomerStats,
+                    request_deserializer=crm__pb2.GetCustomerStatsRequest.FromString,
+                    response_serializer=crm__pb2.CustomerStats.SerializeToString,
+            ),
+            'GetRevenueReport': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRevenueReport,
+                    request_deserializer=crm__pb2.RevenueReportRequest.FromString,
+                    response_serializer=crm__pb2.RevenueReport.SerializeToString,
+            ),
+            'ExportOrders': grpc.unary_stream_rpc_method_handler(
+                    servicer.ExportOrders,
+                    request_deserializer=crm__pb2.ExportOrdersRequest.FromString,
+                    response_serializer=crm__pb2.ExportChunk.SerializeToString,
+            ),
+            'GetMetrics': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMetrics,
+                    request_deserializer=crm__pb2.Empty.FromString,
+                    response_serializer=crm__pb2.MetricsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'crm.OrderService', rpc_method_handlers)
@@ -356,6 +651,33 @@ class OrderService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def CreateOrders(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/crm.OrderService/CreateOrders',
+            crm__pb2.CreateOrdersRequest.SerializeToString,
+            crm__pb2.CreateOrdersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetCustomerOrders(request,
             target,
@@ -382,3 +704,111 @@ class OrderService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetCustomerStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/crm.OrderService/GetCustomerStats',
+            crm__pb2.GetCustomerStatsRequest.SerializeToString,
+            crm__pb2.CustomerStats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRevenueReport(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/crm.OrderService/GetRevenueReport',
+            crm__pb2.RevenueReportRequest.SerializeToString,
+            crm__pb2.RevenueReport.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ExportOrders(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/crm.OrderService/ExportOrders',
+            crm__pb2.ExportOrdersRequest.SerializeToString,
+            crm__pb2.ExportChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMetrics(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/crm.OrderService/GetMetrics',
+            crm__pb2.Empty.SerializeToString,
+            crm__pb2.MetricsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
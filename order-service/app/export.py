@@ -0,0 +1,108 @@
+"""Выгрузка заказов потоком столбцовых пачек: Arrow IPC или Parquet.
+
+Заказы читаются серверным курсором (stream_results + yield_per) по
+EXPORT_BATCH_ROWS строк. Каждая пачка становится RecordBatch в потоке Arrow
+или группой строк Parquet, и записанные байты сразу уходят сообщением
+ExportChunk: в памяти держится одна пачка, а не вся таблица. Склеенные data
+всех сообщений — готовый файл .arrows или .parquet.
+"""
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+import crm_pb2
+from database import Order
+
+order_table = Order.__table__
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "65536"))
+# Сжатие буферов внутри файла; сообщения gRPC поверх него не сжимаются (см. main.SERVER_COMPRESSION_SKIP)
+EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd").strip().lower()
+
+EXPORT_COLUMNS = (
+    order_table.c.id,
+    order_table.c.customer_id,
+    order_table.c.product_name,
+    order_table.c.price,
+    order_table.c.created_at,
+)
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("customer_id", pa.string()),
+    ("product_name", pa.string()),
+    ("price", pa.float64()),
+    # created_at хранится как наивное UTC-время
+    ("created_at", pa.timestamp("us", tz="UTC")),
+])
+
+
+def arrow_writer(sink, compression):
+    options = pa.ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+    return pa.ipc.new_stream(sink, SCHEMA, options=options)
+
+
+def parquet_writer(sink, compression):
+    return pq.ParquetWriter(sink, SCHEMA, compression=compression)
+
+
+EXPORT_WRITERS = {"arrow": arrow_writer, "parquet": parquet_writer}
+
+
+class ChunkSink:
+    """Файл для pyarrow, из которого записанное забирается после каждой пачки"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        # pyarrow может переиспользовать буфер после write, поэтому копируем
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def export_format(value):
+    value = value or "arrow"
+    if value not in EXPORT_WRITERS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_WRITERS)}")
+    return value
+
+
+def export_orders(db, export_format, created_after=None, created_before=None, batch_rows=EXPORT_BATCH_ROWS):
+    """Генератор ExportChunk: по одному на пачку заказов и последний — конец файла"""
+    statement = select(*EXPORT_COLUMNS)
+    if created_after is not None:
+        statement = statement.where(order_table.c.created_at >= created_after)
+    if created_before is not None:
+        statement = statement.where(order_table.c.created_at < created_before)
+
+    sink = ChunkSink()
+    writer = EXPORT_WRITERS[export_format](sink, EXPORT_COMPRESSION)
+    result = db.execute(statement, execution_options={"stream_results": True, "yield_per": batch_rows})
+    for rows in result.partitions():
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(zip(*rows), SCHEMA)], schema=SCHEMA
+        )
+        writer.write_batch(batch)
+        yield crm_pb2.ExportChunk(data=sink.take(), rows=len(rows))
+    # Конец потока Arrow или футер Parquet; для пустой выборки — файл без строк
+    writer.close()
+    yield crm_pb2.ExportChunk(data=sink.take())
@@ -0,0 +1,157 @@
+"""Структурированные логи: одна JSON-строка на запись; одинаковый модуль в сервисах и шлюзе.
+
+Поток RPC только кладёт запись в очередь. Фоновый поток раз в LOG_FLUSH_INTERVAL
+забирает всё накопленное, форматирует и пишет в stdout одним write. Если очередь
+заполнена, запись отбрасывается и попадает в счётчик log.dropped — RPC не ждёт вывода.
+
+При выключенном уровне logger.debug() отсекается проверкой уровня до создания
+записи; поля для extra= в горячих местах собираются под logger.isEnabledFor().
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+
+# Стандартные атрибуты LogRecord; остальные пришли через extra= и выводятся как поля JSON
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, service=None):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if self.service:
+            entry["service"] = self.service
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Пропускает долю rate DEBUG-записей; остальные уровни не трогает"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, records):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # JSON собирает поток записи; здесь только фиксируем текст, пока аргументы не изменились
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogWriter(threading.Thread):
+    def __init__(self, records, formatter, stream, interval):
+        super().__init__(name="log-writer", daemon=True)
+        self.records = records
+        self.formatter = formatter
+        self.stream = stream
+        self.interval = interval
+        self.stopping = threading.Event()
+
+    def run(self):
+        # Пачкой, а не по записи: поток просыпается раз в interval, а не на каждый logger.info()
+        while not self.stopping.wait(self.interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        lines = []
+        while True:
+            try:
+                record = self.records.get_nowait()
+            except queue.Empty:
+                break
+            lines.append(self.formatter.format(record))
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+
+def logger_levels(value):
+    """'orders.server=DEBUG,sqlalchemy.engine=INFO' → {логгер: уровень}"""
+    levels = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, level = item.partition("=")
+        if not sep or not name.strip():
+            raise RuntimeError(f"LOG_LEVELS entries must look like logger=LEVEL: {item.strip()}")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(service=None, stream=None):
+    """Ставит очередь и фоновую запись на корневой логгер; повторный вызов ничего не меняет"""
+    global _handler
+    if _handler is not None:
+        return _handler
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for name, level in logger_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    handler = NonBlockingQueueHandler(queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    handler.addFilter(DebugSampler(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1"))))
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+
+    writer = LogWriter(
+        handler.queue, JsonFormatter(service), stream or sys.stdout, float(os.getenv("LOG_FLUSH_INTERVAL", "0.05"))
+    )
+    writer.start()
+    # При выходе дописываем то, что осталось в очереди
+    atexit.register(writer.stop)
+    _handler = handler
+    return handler
+
+
+def log_metrics():
+    if _handler is None:
+        return {}
+    return {"log.queued": _handler.queue.qsize(), "log.dropped": _handler.dropped}
@@ -1,9 +1,19 @@
 import grpc
 from concurrent import futures
+import logging
 import sys
 import os
 from datetime import datetime, timezone
-from database import SessionLocal, Base, Order
+from database import Order, engine, pool_metrics, session_scope
+from compression import CompressionInterceptor, message_size_options
+from fields import mask_fields, masked_message, projection
+from pagination import page_size, encode_page_token, decode_page_token
+from stats import customer_stats, record_orders
+from reports import load_order_columns, report_percentiles, revenue_report
+from export import export_format, export_orders
+from log import log_metrics, setup_logging
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
 import uuid
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -11,77 +21,253 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import crm_pb2
 import crm_pb2_grpc
 
-class OrderService(crm_pb2_grpc.OrderServiceServicer):
-    def __init__(self):
-        Base.metadata.create_all(bind=SessionLocal().get_bind())
+INSERT_BATCH_SIZE = 500
+
+logger = logging.getLogger("orders.server")
+
+order_table = Order.__table__
+# Списки читаются через Core: строки-кортежи без identity map и отслеживания изменений
+ORDER_COLUMNS = (
+    order_table.c.id,
+    order_table.c.customer_id,
+    order_table.c.product_name,
+    order_table.c.price,
+    order_table.c.created_at,
+)
+
+
+def parse_timestamp(value, name):
+    """ISO 8601 из запроса в наивное UTC-время, как created_at хранится в БД"""
+    if not value:
+        return None
+    try:
+        # fromisoformat в Python 3.10 не понимает суффикс Z
+        parsed = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError as e:
+        raise ValueError(f"{name} must be an ISO 8601 timestamp") from e
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
 
+
+def customer_orders(customer_id, fields, after, created_after, created_before, limit):
+    """Страница заказов клиента: created_after включительно, created_before — нет"""
+    # created_at и id нужны для курсора следующей страницы, даже если их нет в маске
+    columns = projection(ORDER_COLUMNS, fields, required=("created_at", "id"))
+    query = (
+        select(*columns)
+        .where(order_table.c.customer_id == customer_id)
+        .order_by(order_table.c.created_at, order_table.c.id)
+    )
+    if created_after:
+        query = query.where(order_table.c.created_at >= created_after)
+    if created_before:
+        query = query.where(order_table.c.created_at < created_before)
+    if after:
+        query = query.where(tuple_(order_table.c.created_at, order_table.c.id) > tuple_(*after))
+    # Лишняя строка показывает, есть ли следующая страница
+    return query.limit(limit + 1)
+
+
+def order_row_message(row):
+    """Order из строки ORDER_COLUMNS"""
+    order_id, customer_id, product_name, price, created_at = row
+    return crm_pb2.Order(
+        id=order_id,
+        customer_id=customer_id,
+        product_name=product_name,
+        price=price,
+        created_at=created_at.isoformat()
+    )
+
+class OrderService(crm_pb2_grpc.OrderServiceServicer):
     def get_db(self):
-        db = SessionLocal()
-        try: return db
-        finally: db.close()
+        return session_scope()
 
     def CreateOrder(self, request, context):
-        print(f"Создание заказа: customer_id={request.customer_id}, товар={request.product_name}, цена={request.price}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Создание заказа", extra={
+                "customer_id": request.customer_id, "product_name": request.product_name, "price": request.price
+            })
 
         if not request.customer_id:
-            context.abort(400, "customer_id is required")
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "customer_id is required")
             return
         
-        db = self.get_db()
-        order_id = f"order_{uuid.uuid4()}"
-
-        order = Order(
-            id = order_id,
-            customer_id = request.customer_id,
-            product_name = request.product_name,
-            price = request.price
-        )
-        db.add(order)
-        db.commit()
-        db.refresh(order)
-
-        return crm_pb2.OrderResponse(
-            order = crm_pb2.Order(
-                id = order.id,
-                customer_id = order.customer_id,
-                product_name = order.product_name,
-                price = order.price,
-                created_at = order.created_at.isoformat()
+        with self.get_db() as db:
+            order_id = f"order_{uuid.uuid4()}"
+
+            order = Order(
+                id = order_id,
+                customer_id = request.customer_id,
+                product_name = request.product_name,
+                price = request.price,
+                # Время нужно агрегатам до коммита
+                created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            )
+            db.add(order)
+            record_orders(db, [{
+                "customer_id": order.customer_id, "price": order.price, "created_at": order.created_at
+            }])
+            db.commit()
+            db.refresh(order)
+
+            return crm_pb2.OrderResponse(
+                order = crm_pb2.Order(
+                    id = order.id,
+                    customer_id = order.customer_id,
+                    product_name = order.product_name,
+                    price = order.price,
+                    created_at = order.created_at.isoformat()
+                )
             )
-        )
     
+    def CreateOrders(self, request_iterator, context):
+        results = []
+        batch = []
+
+        def flush(db):
+            # Одна транзакция и один многострочный INSERT на пачку; при ошибке
+            # пачка откатывается целиком и каждая её позиция получает error
+            try:
+                rows = [row for _, row in batch]
+                db.execute(insert(Order), rows)
+                record_orders(db, rows)
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                for index, _ in batch:
+                    results[index] = crm_pb2.OrderResult(error=f"insert failed: {e.__class__.__name__}")
+            else:
+                for index, row in batch:
+                    results[index] = crm_pb2.OrderResult(order=crm_pb2.Order(
+                        id=row["id"],
+                        customer_id=row["customer_id"],
+                        product_name=row["product_name"],
+                        price=row["price"],
+                        created_at=row["created_at"].isoformat()
+                    ))
+            batch.clear()
+
+        with self.get_db() as db:
+            for request in request_iterator:
+                if not request.customer_id:
+                    results.append(crm_pb2.OrderResult(error="customer_id is required"))
+                    continue
+
+                results.append(None)
+                batch.append((len(results) - 1, {
+                    "id": f"order_{uuid.uuid4()}",
+                    "customer_id": request.customer_id,
+                    "product_name": request.product_name,
+                    "price": request.price,
+                    # Без refresh: время ставим сами в том же виде, в каком его вернёт БД
+                    "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+                }))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    flush(db)
+            if batch:
+                flush(db)
+
+        return crm_pb2.CreateOrdersResponse(results=results)
+
     def GetCustomerOrders(self, request, context):
-        print(f"Получен запрос для customer_id: {request.customer_id}")
         if not request.customer_id:
-            context.abort(400, "customer_id is required")
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "customer_id is required")
             return
+        try:
+            fields = mask_fields(request.fields, ORDER_COLUMNS)
+            limit = page_size(request.page_size)
+            after = decode_page_token(request.page_token) if request.page_token else None
+            created_after = parse_timestamp(request.created_after, "created_after")
+            created_before = parse_timestamp(request.created_before, "created_before")
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            return
+
+        with self.get_db() as db:
+            try:
+                rows = db.execute(
+                    customer_orders(request.customer_id, fields, after, created_after, created_before, limit)
+                ).all()
+            except Exception:
+                logger.exception("Ошибка в GetCustomerOrders", extra={"customer_id": request.customer_id})
+                context.abort(grpc.StatusCode.INTERNAL, "Internal error")
+                return
 
-        db = self.get_db()
+        next_page_token = ""
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_page_token = encode_page_token(rows[-1].created_at, rows[-1].id)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Найдено заказов", extra={"customer_id": request.customer_id, "orders": len(rows)})
+        if fields is None:
+            orders = [order_row_message(row) for row in rows]
+        else:
+            orders = [masked_message(crm_pb2.Order, fields, row) for row in rows]
+        return crm_pb2.OrderListResponse(orders=orders, next_page_token=next_page_token)
+
+    def GetCustomerStats(self, request, context):
+        if not request.customer_id:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "customer_id is required")
+            return
+
+        with self.get_db() as db:
+            return customer_stats(db, request.customer_id)
+
+    def GetRevenueReport(self, request, context):
         try:
-            print(f"Поиск заказов для {request.customer_id}")
-            order = db.query(Order).filter(Order.customer_id == request.customer_id).all()
-            print(f"Найдено заказов: {len(order)}") 
-            order_list = [
-                crm_pb2.Order(
-                    id=o.id,
-                    customer_id=o.customer_id,
-                    product_name=o.product_name,
-                    price=o.price,
-                    created_at=o.created_at.isoformat()
-                )
-                for o in order
-            ]
-            return crm_pb2.OrderListResponse(orders = order_list)
-        except Exception as e:
-            print(f"Ошибка в GetCustomerOrders: {e}")
-            context.abort(500, "Internal error")
+            percentiles = report_percentiles(request.period, request.group_by, request.percentiles, request.limit)
+            created_after = parse_timestamp(request.created_after, "created_after")
+            created_before = parse_timestamp(request.created_before, "created_before")
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
             return
+
+        with self.get_db() as db:
+            columns = load_order_columns(db, request.group_by, created_after, created_before)
+        return revenue_report(columns, request.period, percentiles, request.limit)
+
+    def ExportOrders(self, request, context):
+        try:
+            fmt = export_format(request.format)
+            created_after = parse_timestamp(request.created_after, "created_after")
+            created_before = parse_timestamp(request.created_before, "created_before")
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            return
+
+        # Сессия и серверный курсор живут, пока клиент читает поток
+        with self.get_db() as db:
+            yield from export_orders(db, fmt, created_after, created_before)
+
+    def GetMetrics(self, request, context):
+        values = {"grpc.max_workers": MAX_WORKERS}
+        values.update(pool_metrics(engine))
+        values.update(log_metrics())
+        return crm_pb2.MetricsResponse(values=values)
     
+SERVER_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_recv_ping_interval_without_data_ms", 10000),
+    ("grpc.http2.max_ping_strikes", 0),
+    *message_size_options(),
+]
+
+# Выгрузка уже сжата внутри Arrow / Parquet, повторный gzip только тратит CPU
+SERVER_COMPRESSION_SKIP = ("/crm.OrderService/ExportOrders",)
+
+MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+GRPC_PORT = os.getenv("GRPC_PORT", "50052")
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    setup_logging("order-service")
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+        options=SERVER_OPTIONS,
+        interceptors=[CompressionInterceptor(skip=SERVER_COMPRESSION_SKIP)]
+    )
     crm_pb2_grpc.add_OrderServiceServicer_to_server(OrderService(), server)
-    server.add_insecure_port('[::]:50052')
-    print("Order Service запущен. Порт 50052")
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    logger.info("Order Service запущен", extra={"port": GRPC_PORT})
     server.start()
     server.wait_for_termination()
 
@@ -0,0 +1,100 @@
+"""Версионные миграции схемы. Запускаются один раз при деплое:
+
+    python app/migrations.py
+"""
+import logging
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, inspect, select, insert, text
+from sqlalchemy.schema import CreateTable
+
+from database import CustomerOrderStats, Order, engine
+from log import setup_logging
+from stats import rebuild as rebuild_order_stats
+
+# Произвольный ключ advisory-блокировки: реплики, стартующие одновременно, ждут друг друга
+MIGRATION_LOCK_ID = 7321002
+
+logger = logging.getLogger("orders.migrations")
+
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def create_table(conn, table):
+    # Только CREATE TABLE: индексы модели добавляют свои миграции
+    if not inspect(conn).has_table(table.name):
+        conn.execute(CreateTable(table))
+
+
+def create_index(conn, table, name):
+    index = next(i for i in table.indexes if i.name == name)
+    index.create(conn, checkfirst=True)
+
+
+def initial_schema(conn):
+    # Таблица могла появиться раньше через create_all
+    create_table(conn, Order.__table__)
+
+
+def order_indexes(conn):
+    # DDL здесь, а не из модели: в модели индекс с тех пор заменён миграцией 3
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_orders_customer_id_created_at ON "Orders" (customer_id, created_at)'))
+
+
+def order_keyset_index(conn):
+    create_index(conn, Order.__table__, "ix_orders_customer_id_created_at_id")
+    conn.execute(text("DROP INDEX IF EXISTS ix_orders_customer_id_created_at"))
+
+
+def customer_order_stats(conn):
+    create_table(conn, CustomerOrderStats.__table__)
+    # Заполняется из уже существующих заказов
+    rebuild_order_stats(conn)
+
+
+MIGRATIONS = [
+    (1, "initial schema", initial_schema),
+    (2, "order indexes", order_indexes),
+    (3, "order keyset index", order_keyset_index),
+    (4, "customer order stats", customer_order_stats),
+]
+
+
+def current_version(conn):
+    return conn.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version.desc())).scalar() or 0
+
+
+def migrate(bind=engine, target=None):
+    """Применяет недостающие миграции в одной транзакции, возвращает список применённых версий"""
+    applied = []
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        metadata.create_all(conn)
+        version = current_version(conn)
+        for number, name, upgrade in MIGRATIONS:
+            if number <= version or (target is not None and number > target):
+                continue
+            upgrade(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=number, name=name, applied_at=datetime.now(timezone.utc).replace(tzinfo=None)
+            ))
+            applied.append(number)
+    return applied
+
+
+if __name__ == "__main__":
+    setup_logging("order-service")
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    applied = migrate(target=target)
+    if applied:
+        logger.info("Применены миграции", extra={"versions": applied})
+    else:
+        logger.info("Схема актуальна")
@@ -0,0 +1,149 @@
+"""Отчёт о выручке: по дням, неделям или месяцам, по товарам или клиентам.
+
+Заказы читаются пачками по REPORT_CHUNK_SIZE строк (на PostgreSQL — серверным
+курсором) в столбцы NumPy: цена, время создания в секундах эпохи и код товара
+или клиента. Группы, суммы и перцентили цены считаются над целыми массивами
+после сортировки, без цикла по заказам.
+"""
+import os
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, select
+
+import crm_pb2
+from database import Order
+
+order_table = Order.__table__
+
+REPORT_CHUNK_SIZE = int(os.getenv("REPORT_CHUNK_SIZE", "50000"))
+PERIODS = ("day", "week", "month")
+GROUP_COLUMNS = {"product": order_table.c.product_name, "customer": order_table.c.customer_id}
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+# Секунды эпохи считает БД: иначе на каждую строку создаётся и разбирается datetime
+EPOCH_DIALECTS = {
+    "postgresql": lambda column: cast(func.floor(func.extract("epoch", column)), BigInteger),
+    "sqlite": lambda column: cast(func.strftime("%s", column), BigInteger),
+}
+
+
+class OrderColumns:
+    def __init__(self, price, created_at, codes, keys):
+        self.price = price            # float64
+        self.created_at = created_at  # int64, секунды эпохи UTC
+        self.codes = codes            # int32, индекс в keys
+        self.keys = keys
+
+
+def report_percentiles(period, group_by, percentiles, limit):
+    """Проверяет параметры отчёта до чтения заказов; возвращает перцентили"""
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+    if group_by and group_by not in GROUP_COLUMNS:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_COLUMNS)}")
+    if limit < 0:
+        raise ValueError("limit must not be negative")
+    percentiles = tuple(percentiles) or DEFAULT_PERCENTILES
+    if not all(0 <= p <= 100 for p in percentiles):
+        raise ValueError("percentiles must be between 0 and 100")
+    return percentiles
+
+
+def load_order_columns(db, group_by="", created_after=None, created_before=None, chunk_size=REPORT_CHUNK_SIZE):
+    dialect = db.get_bind().dialect.name
+    if dialect not in EPOCH_DIALECTS:
+        raise RuntimeError(f"Revenue reports are not supported for {dialect}")
+    key_column = GROUP_COLUMNS.get(group_by)
+    columns = [order_table.c.price, EPOCH_DIALECTS[dialect](order_table.c.created_at)]
+    if key_column is not None:
+        columns.append(key_column)
+    statement = select(*columns).where(order_table.c.created_at.isnot(None))
+    if created_after is not None:
+        statement = statement.where(order_table.c.created_at >= created_after)
+    if created_before is not None:
+        statement = statement.where(order_table.c.created_at < created_before)
+
+    result = db.execute(statement, execution_options={"stream_results": True, "yield_per": chunk_size})
+    prices, times, codes = [], [], []
+    keys = {}
+    for rows in result.partitions():
+        values = list(zip(*rows))
+        prices.append(np.fromiter(values[0], np.float64, len(rows)))
+        times.append(np.fromiter(values[1], np.int64, len(rows)))
+        if key_column is not None:
+            codes.append(np.fromiter((keys.setdefault(key, len(keys)) for key in values[2]), np.int32, len(rows)))
+
+    price = np.concatenate(prices) if prices else np.empty(0, np.float64)
+    created_at = np.concatenate(times) if times else np.empty(0, np.int64)
+    if key_column is None:
+        return OrderColumns(price, created_at, np.zeros(len(price), np.int32), [""])
+    return OrderColumns(price, created_at, np.concatenate(codes) if codes else np.empty(0, np.int32), list(keys))
+
+
+def period_ordinals(created_at, period):
+    """Номер дня, недели (с понедельника) или месяца от начала эпохи"""
+    days = created_at // 86400
+    if period == "day":
+        return days
+    if period == "week":
+        # 1970-01-01 — четверг
+        return (days + 3) // 7
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def period_labels(ordinals, period):
+    if period == "day":
+        days = ordinals.astype("datetime64[D]")
+    elif period == "week":
+        days = (ordinals * 7 - 3).astype("datetime64[D]")
+    else:
+        days = ordinals.astype("datetime64[M]").astype("datetime64[D]")
+    return days.astype(str)
+
+
+def revenue_report(columns, period, percentiles=DEFAULT_PERCENTILES, limit=0):
+    """Строки отчёта по возрастанию периода, внутри периода — по убыванию выручки"""
+    report = crm_pb2.RevenueReport(percentiles=percentiles)
+    if not len(columns.price):
+        return report
+
+    ordinals = period_ordinals(columns.created_at, period)
+    first_period = ordinals.min()
+    width = max(len(columns.keys), 1)
+    group = (ordinals - first_period) * width + columns.codes
+    # Заказы группы подряд, внутри группы по возрастанию цены. Две сортировки
+    # (цена, затем устойчиво группа) вдвое быстрее np.lexsort по двум ключам
+    order = np.argsort(columns.price)
+    order = order[np.argsort(group[order], kind="stable")]
+    group = group[order]
+    price = columns.price[order]
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    counts = np.diff(np.r_[starts, len(group)])
+    revenue = np.add.reduceat(price, starts)
+
+    # Перцентили с линейной интерполяцией, как np.percentile внутри каждой группы
+    position = starts[:, None] + (counts[:, None] - 1) * (np.asarray(percentiles) / 100)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+    values = price[lower] + (price[upper] - price[lower]) * (position - lower)
+
+    group_period = group[starts] // width
+    rows = np.lexsort((-revenue, group_period))
+    if limit:
+        period_sorted = group_period[rows]
+        period_first = np.flatnonzero(np.r_[True, period_sorted[1:] != period_sorted[:-1]])
+        rank = np.arange(len(rows)) - np.repeat(period_first, np.diff(np.r_[period_first, len(rows)]))
+        rows = rows[rank < limit]
+
+    labels = period_labels(group_period[rows] + first_period, period)
+    codes = (group[starts] % width)[rows]
+    keys = columns.keys
+    report.rows.extend(
+        crm_pb2.RevenueReportRow(
+            period_start=label, key=keys[code], order_count=count, revenue=total, price_percentiles=row_values
+        )
+        for label, code, count, total, row_values in zip(
+            labels.tolist(), codes.tolist(), counts[rows].tolist(), revenue[rows].tolist(), values[rows].tolist()
+        )
+    )
+    return report
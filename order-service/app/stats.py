@@ -0,0 +1,104 @@
+"""Агрегаты заказов по клиентам в таблице CustomerOrderStats.
+
+record_orders() вызывается в транзакции вставки заказов, поэтому агрегаты
+не расходятся с Orders. Пересборка из Orders (после ручных правок, импорта
+в обход сервиса):
+
+    python app/stats.py
+"""
+import logging
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+import crm_pb2
+from database import CustomerOrderStats, Order, engine
+from log import setup_logging
+
+stats_table = CustomerOrderStats.__table__
+order_table = Order.__table__
+
+logger = logging.getLogger("orders.stats")
+
+# INSERT ... ON CONFLICT DO UPDATE и «наибольшее из двух» в поддерживаемых диалектах
+UPSERT_DIALECTS = {
+    "postgresql": (postgresql.insert, func.greatest),
+    "sqlite": (sqlite.insert, func.max),
+}
+
+
+def aggregate(rows):
+    """Строки заказов (dict) → по клиенту: число, сумма, время последнего"""
+    totals = defaultdict(lambda: [0, 0.0, None])
+    for row in rows:
+        total = totals[row["customer_id"]]
+        total[0] += 1
+        total[1] += row["price"]
+        if total[2] is None or row["created_at"] > total[2]:
+            total[2] = row["created_at"]
+    # Порядок по customer_id: параллельные пачки блокируют строки в одном порядке и не взаимоблокируются
+    return [
+        {"customer_id": customer_id, "order_count": count, "total_spent": spent, "last_order_at": last}
+        for customer_id, (count, spent, last) in sorted(totals.items())
+    ]
+
+
+def record_orders(db, rows):
+    """Добавляет заказы к агрегатам одним upsert; коммитит вызывающий вместе с заказами"""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        raise RuntimeError(f"Order stats upsert is not supported for {dialect}")
+    dialect_insert, greatest = UPSERT_DIALECTS[dialect]
+    statement = dialect_insert(stats_table)
+    # Строка клиента блокируется до коммита, поэтому одновременные заказы не теряют приращений
+    statement = statement.on_conflict_do_update(
+        index_elements=[stats_table.c.customer_id],
+        set_={
+            "order_count": stats_table.c.order_count + statement.excluded.order_count,
+            "total_spent": stats_table.c.total_spent + statement.excluded.total_spent,
+            "last_order_at": greatest(stats_table.c.last_order_at, statement.excluded.last_order_at),
+        }
+    )
+    db.execute(statement, aggregate(rows))
+
+
+def customer_stats(db, customer_id):
+    """Одна строка по первичному ключу; клиент без заказов — нули"""
+    row = db.execute(select(stats_table).where(stats_table.c.customer_id == customer_id)).first()
+    if row is None:
+        return crm_pb2.CustomerStats(customer_id=customer_id)
+    return crm_pb2.CustomerStats(
+        customer_id=customer_id,
+        order_count=row.order_count,
+        total_spent=row.total_spent,
+        average_order_value=row.total_spent / row.order_count,
+        last_order_at=row.last_order_at.isoformat()
+    )
+
+
+def rebuild(conn):
+    """Пересчитывает все агрегаты из Orders в транзакции conn"""
+    if conn.dialect.name == "postgresql":
+        # Upsert'ы новых заказов ждут конца пересборки и не теряются между DELETE и INSERT
+        conn.execute(text('LOCK TABLE "CustomerOrderStats" IN EXCLUSIVE MODE'))
+    conn.execute(delete(stats_table))
+    conn.execute(insert(stats_table).from_select(
+        ["customer_id", "order_count", "total_spent", "last_order_at"],
+        select(
+            order_table.c.customer_id,
+            func.count(),
+            func.sum(order_table.c.price),
+            func.max(order_table.c.created_at),
+        ).group_by(order_table.c.customer_id)
+    ))
+
+
+if __name__ == "__main__":
+    setup_logging("order-service")
+    with engine.begin() as conn:
+        rebuild(conn)
+        customers = conn.execute(select(func.count()).select_from(stats_table)).scalar()
+    logger.info("Агрегаты заказов пересобраны", extra={"customers": customers})
@@ -4,9 +4,13 @@ import pytest
 from unittest.mock import MagicMock
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
 
 from app.main import OrderService
+from database import SessionLocal, Order, CustomerOrderStats
+from migrations import migrate, MIGRATIONS
 import crm_pb2
+import grpc
 
 
 @pytest.fixture
@@ -18,7 +22,16 @@ def service():
 @pytest.fixture(autouse=True)
 def reset_database(service):
     """Очищаем базу заказов перед каждым тестом"""
-    service.orders_db.clear()
+    migrate()
+    with SessionLocal() as db:
+        db.query(Order).delete()
+        db.query(CustomerOrderStats).delete()
+        db.commit()
+
+
+def count_orders():
+    with SessionLocal() as db:
+        return db.query(Order).count()
 
 
 def test_create_order(service):
@@ -36,7 +49,7 @@ def test_create_order(service):
     assert response.order.product_name == "Laptop"
     assert response.order.price == 999.99
     assert response.order.id is not None
-    assert len(service.orders_db) == 1
+    assert count_orders() == 1
 
 
 def test_create_order_missing_customer_id(service):
@@ -49,7 +62,7 @@ def test_create_order_missing_customer_id(service):
 
     response = service.CreateOrder(request, context)
 
-    context.abort.assert_called_once_with(400, "customer_id is required")
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "customer_id is required")
 
 
 def test_get_customer_orders_empty(service):
@@ -86,6 +99,60 @@ def test_get_customer_orders_with_data(service):
     assert response.orders[1].product_name == "Pen"
 
 
+def test_get_customer_orders_field_mask(service):
+    """Тест: FieldMask оставляет в ответе только запрошенные поля"""
+    from google.protobuf.field_mask_pb2 import FieldMask
+
+    service.CreateOrder(
+        crm_pb2.CreateOrdersRequest(customer_id="cust_1", product_name="Book", price=15.0),
+        MagicMock()
+    )
+
+    request = crm_pb2.GetCustomerOrdersRequest(customer_id="cust_1", fields=FieldMask(paths=["price", "product_name"]))
+    response = service.GetCustomerOrders(request, MagicMock())
+    assert list(response.orders) == [crm_pb2.Order(product_name="Book", price=15.0)]
+
+    context = MagicMock()
+    request = crm_pb2.GetCustomerOrdersRequest(customer_id="cust_1", fields=FieldMask(paths=["status"]))
+    service.GetCustomerOrders(request, context)
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "Unknown fields: status")
+
+
+def test_get_customer_orders_pagination(service):
+    """Тест: страницы по (created_at, id) и фильтр по дате создания"""
+    from datetime import datetime, timedelta
+
+    base = datetime(2025, 1, 1)
+    with SessionLocal() as db:
+        # Два заказа с одинаковым created_at: порядок между ними задаёт id
+        db.add_all([
+            Order(id=f"order_{i}", customer_id="cust_1", product_name=f"Item {i}", price=1.0,
+                  created_at=base + timedelta(days=min(i, 3)))
+            for i in range(5)
+        ])
+        db.commit()
+
+    ids, token = [], ""
+    while True:
+        request = crm_pb2.GetCustomerOrdersRequest(customer_id="cust_1", page_size=2, page_token=token)
+        response = service.GetCustomerOrders(request, MagicMock())
+        ids += [o.id for o in response.orders]
+        token = response.next_page_token
+        if not token:
+            break
+    assert ids == [f"order_{i}" for i in range(5)]
+
+    request = crm_pb2.GetCustomerOrdersRequest(
+        customer_id="cust_1", created_after="2025-01-02T00:00:00Z", created_before="2025-01-04"
+    )
+    response = service.GetCustomerOrders(request, MagicMock())
+    assert [o.id for o in response.orders] == ["order_1", "order_2"]
+
+    context = MagicMock()
+    service.GetCustomerOrders(crm_pb2.GetCustomerOrdersRequest(customer_id="cust_1", created_after="вчера"), context)
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "created_after must be an ISO 8601 timestamp")
+
+
 def test_get_customer_orders_no_customer_id(service):
     """Тест: ошибка при отсутствии customer_id в запросе"""
     request = crm_pb2.GetCustomerOrdersRequest(customer_id="")
@@ -93,4 +160,210 @@ def test_get_customer_orders_no_customer_id(service):
 
     response = service.GetCustomerOrders(request, context)
 
-    context.abort.assert_called_once_with(400, "customer_id is required")
\ No newline at end of file
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "customer_id is required")
+
+
+def test_create_orders_batch(service):
+    """Тест: пакетное создание заказов с результатом по каждой позиции"""
+    requests = [
+        crm_pb2.CreateOrdersRequest(customer_id="cust_1", product_name="Book", price=15.0),
+        crm_pb2.CreateOrdersRequest(product_name="Pen", price=2.5),
+        crm_pb2.CreateOrdersRequest(customer_id="cust_2", product_name="Phone", price=500.0),
+    ]
+
+    response = service.CreateOrders(iter(requests), MagicMock())
+
+    assert len(response.results) == 3
+    assert response.results[0].order.product_name == "Book"
+    assert response.results[1].error == "customer_id is required"
+    assert response.results[2].order.customer_id == "cust_2"
+    assert count_orders() == 2
+
+    orders = service.GetCustomerOrders(crm_pb2.GetCustomerOrdersRequest(customer_id="cust_1"), MagicMock())
+    assert orders.orders[0].id == response.results[0].order.id
+    assert orders.orders[0].created_at == response.results[0].order.created_at
+
+
+def test_create_orders_large_batch(service):
+    """Тест: несколько пачек INSERT в одном потоке"""
+    requests = (
+        crm_pb2.CreateOrdersRequest(customer_id=f"cust_{i % 7}", product_name="Item", price=float(i))
+        for i in range(1201)
+    )
+
+    response = service.CreateOrders(requests, MagicMock())
+
+    assert len(response.results) == 1201
+    assert all(r.order.id for r in response.results)
+    assert count_orders() == 1201
+
+
+def test_customer_stats(service):
+    """Тест: агрегаты обновляются вместе с заказами и совпадают с пересборкой"""
+    from database import engine
+    from stats import rebuild
+
+    service.CreateOrder(crm_pb2.CreateOrdersRequest(customer_id="cust_1", product_name="Book", price=10.0), MagicMock())
+    service.CreateOrders(iter([
+        crm_pb2.CreateOrdersRequest(customer_id="cust_1", product_name="Pen", price=2.0),
+        crm_pb2.CreateOrdersRequest(customer_id="cust_1", product_name="Lamp", price=30.0),
+        crm_pb2.CreateOrdersRequest(customer_id="cust_2", product_name="Phone", price=500.0),
+    ]), MagicMock())
+
+    request = crm_pb2.GetCustomerStatsRequest(customer_id="cust_1")
+    stats = service.GetCustomerStats(request, MagicMock())
+    assert (stats.order_count, stats.total_spent, stats.average_order_value) == (3, 42.0, 14.0)
+    last = service.GetCustomerOrders(crm_pb2.GetCustomerOrdersRequest(customer_id="cust_1"), MagicMock()).orders[-1]
+    assert stats.last_order_at == last.created_at
+
+    with engine.begin() as conn:
+        rebuild(conn)
+    assert service.GetCustomerStats(request, MagicMock()) == stats
+
+    empty = service.GetCustomerStats(crm_pb2.GetCustomerStatsRequest(customer_id="cust_3"), MagicMock())
+    assert empty == crm_pb2.CustomerStats(customer_id="cust_3")
+
+
+def test_revenue_report(service):
+    """Тест: выручка, число заказов и перцентили цены по периодам и группам"""
+    import numpy as np
+    from datetime import datetime
+
+    orders = [
+        # 2025-01-06 — понедельник
+        ("cust_1", "Book", 10.0, datetime(2025, 1, 6, 0, 0)),
+        ("cust_1", "Book", 30.0, datetime(2025, 1, 7, 12, 0)),
+        ("cust_2", "Book", 20.0, datetime(2025, 1, 12, 23, 59, 59)),
+        ("cust_2", "Phone", 500.0, datetime(2025, 1, 13, 9, 0)),
+        ("cust_1", "Pen", 2.0, datetime(2025, 2, 1, 0, 0)),
+    ]
+    with SessionLocal() as db:
+        db.add_all([
+            Order(id=f"order_{i}", customer_id=customer_id, product_name=product, price=price, created_at=created_at)
+            for i, (customer_id, product, price, created_at) in enumerate(orders)
+        ])
+        db.commit()
+
+    def report(**kwargs):
+        response = service.GetRevenueReport(crm_pb2.RevenueReportRequest(**kwargs), MagicMock())
+        return [(r.period_start, r.key, r.order_count, r.revenue, list(r.price_percentiles)) for r in response.rows]
+
+    assert report(period="week", group_by="product", percentiles=[0, 50, 100]) == [
+        ("2025-01-06", "Book", 3, 60.0, [10.0, 20.0, 30.0]),
+        ("2025-01-13", "Phone", 1, 500.0, [500.0, 500.0, 500.0]),
+        ("2025-01-27", "Pen", 1, 2.0, [2.0, 2.0, 2.0]),
+    ]
+    january, february = report(period="month")
+    assert january[:4] == ("2025-01-01", "", 4, 560.0)
+    assert january[4] == pytest.approx(np.percentile([10.0, 30.0, 20.0, 500.0], [50, 90, 99]))
+    assert february == ("2025-02-01", "", 1, 2.0, [2.0, 2.0, 2.0])
+    # Внутри периода группы по убыванию выручки, limit оставляет первые
+    assert [row[:4] for row in report(period="month", group_by="customer", limit=1)] == [
+        ("2025-01-01", "cust_2", 2, 520.0), ("2025-02-01", "cust_1", 1, 2.0)
+    ]
+    assert [row[:3] for row in report(period="day", created_after="2025-01-07", created_before="2025-01-13")] == [
+        ("2025-01-07", "", 1), ("2025-01-12", "", 1)
+    ]
+
+    context = MagicMock()
+    service.GetRevenueReport(crm_pb2.RevenueReportRequest(period="year"), context)
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "period must be one of: day, week, month")
+
+
+def test_export_orders(service):
+    """Тест: выгрузка в Arrow и Parquet пачками, склеенные куски читаются как файл"""
+    import io
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from datetime import datetime, timezone
+    from database import session_scope
+    from export import export_orders
+
+    with SessionLocal() as db:
+        db.add_all([
+            Order(id=f"order_{i}", customer_id=f"cust_{i % 2}", product_name="Book", price=float(i),
+                  created_at=datetime(2025, 1, 1 + i, 12, 30, 0, 250))
+            for i in range(5)
+        ])
+        db.commit()
+
+    with session_scope() as db:
+        chunks = list(export_orders(db, "arrow", batch_rows=2))
+    assert [chunk.rows for chunk in chunks] == [2, 2, 1, 0]
+    table = pa.ipc.open_stream(b"".join(chunk.data for chunk in chunks)).read_all()
+    assert table.column("id").to_pylist() == [f"order_{i}" for i in range(5)]
+    assert table.column("created_at")[0].as_py() == datetime(2025, 1, 1, 12, 30, 0, 250, tzinfo=timezone.utc)
+
+    request = crm_pb2.ExportOrdersRequest(format="parquet", created_after="2025-01-02", created_before="2025-01-04")
+    data = b"".join(chunk.data for chunk in service.ExportOrders(request, MagicMock()))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column("id").to_pylist() == ["order_1", "order_2"]
+    assert table.column("price").to_pylist() == [1.0, 2.0]
+
+    context = MagicMock()
+    list(service.ExportOrders(crm_pb2.ExportOrdersRequest(format="csv"), context))
+    context.abort.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT, "format must be one of: arrow, parquet")
+
+
+def test_structured_logging():
+    """Тест: JSON-строки с полями extra, выборка DEBUG и отбрасывание при полной очереди"""
+    import io
+    import json
+    import logging
+    import queue
+    from log import DebugSampler, JsonFormatter, LogWriter, NonBlockingQueueHandler, logger_levels
+
+    handler = NonBlockingQueueHandler(queue.Queue(2))
+    handler.addFilter(DebugSampler(0))
+    logger = logging.getLogger("orders.test")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    try:
+        logger.debug("не попадёт в выборку")
+        logger.info("Найдено заказов: %d", 2, extra={"customer_id": "cust_1"})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Ошибка")
+        logger.info("очередь заполнена")
+    finally:
+        logger.removeHandler(handler)
+    assert handler.dropped == 1
+
+    output = io.StringIO()
+    LogWriter(handler.queue, JsonFormatter("order-service"), output, 0).flush()
+    first, second = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert first["message"] == "Найдено заказов: 2"
+    assert (first["level"], first["logger"], first["service"], first["customer_id"]) == (
+        "INFO", "orders.test", "order-service", "cust_1"
+    )
+    assert "ValueError: boom" in second["exc"]
+
+    assert logger_levels(" orders.server=debug, grpc=WARNING,") == {"orders.server": "DEBUG", "grpc": "WARNING"}
+    with pytest.raises(RuntimeError):
+        logger_levels("DEBUG")
+
+
+def test_get_metrics(service):
+    """Тест: метрики сервиса"""
+    response = service.GetMetrics(crm_pb2.Empty(), MagicMock())
+
+    assert response.values["grpc.max_workers"] > 0
+
+
+def test_migrations(tmp_path):
+    """Тест: миграции создают индексы и повторно не применяются"""
+    from database import create_db_engine
+    from sqlalchemy import inspect
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+    assert migrate(engine, target=1) == [1]
+    assert inspect(engine).get_indexes("Orders") == []
+    assert migrate(engine, target=2) == [2]
+    assert {i["name"] for i in inspect(engine).get_indexes("Orders")} == {"ix_orders_customer_id_created_at"}
+    assert migrate(engine) == [number for number, _, _ in MIGRATIONS[2:]]
+    assert migrate(engine) == []
+    assert {i["name"] for i in inspect(engine).get_indexes("Orders")} == {"ix_orders_customer_id_created_at_id"}
+    engine.dispose()